@@ -1,5 +1,7 @@
 import pandas as pd
 import streamlit as st
+from dataclasses import dataclass
+from functools import lru_cache
 from datetime import datetime
 from pytz import timezone
 
@@ -14,6 +16,7 @@ weights = {
     "DVP_Bias": 1,
 }
 
+@lru_cache(maxsize=64)
 def final_verdict(score):
     """Convert numerical score to market verdict"""
     if score >= 4:
@@ -40,11 +43,11 @@ def delta_volume_bias(price, volume, chg_oi):
     else:
         return "Neutral"
 
-def determine_level(row):
-    """Determine if strike is support or resistance"""
-    if row['openInterest_PE'] > 1.12 * row['openInterest_CE']:
+def determine_level(oi_ce, oi_pe):
+    """Determine if strike is support or resistance from CE/PE open interest"""
+    if oi_pe > 1.12 * oi_ce:
         return "Support"
-    elif row['openInterest_CE'] > 1.12 * row['openInterest_PE']:
+    elif oi_ce > 1.12 * oi_pe:
         return "Resistance"
     else:
         return "Neutral"
@@ -53,27 +56,26 @@ def calculate_bias_scores(df, atm_strike, underlying):
     """Calculate bias scores for all strikes"""
     bias_results, total_score = [], 0
     
-    for _, row in df.iterrows():
-        if abs(row['strikePrice'] - atm_strike) > 100:
-            continue
-
+    # Only ATM ±2 strikes are scored; attribute access on namedtuples avoids per-row Series boxing
+    near_atm = df[(df['strikePrice'] - atm_strike).abs() <= 100]
+    for row in near_atm.itertuples(index=False):
         score = 0
-        zone = 'ATM' if row['strikePrice'] == atm_strike else 'ITM' if row['strikePrice'] < underlying else 'OTM'
+        zone = 'ATM' if row.strikePrice == atm_strike else 'ITM' if row.strikePrice < underlying else 'OTM'
         
         row_data = {
-            "Strike": row['strikePrice'],
+            "Strike": row.strikePrice,
             "Zone": zone,
-            "Level": determine_level(row),
-            "ChgOI_Bias": "Bullish" if row['changeinOpenInterest_CE'] < row['changeinOpenInterest_PE'] else "Bearish",
-            "Volume_Bias": "Bullish" if row['totalTradedVolume_CE'] < row['totalTradedVolume_PE'] else "Bearish",
-            "Gamma_Bias": "Bullish" if row['Gamma_CE'] < row['Gamma_PE'] else "Bearish",
-            "AskQty_Bias": "Bullish" if row['askQty_PE'] > row['askQty_CE'] else "Bearish",
-            "BidQty_Bias": "Bearish" if row['bidQty_PE'] > row['bidQty_CE'] else "Bullish",
-            "IV_Bias": "Bullish" if row['impliedVolatility_CE'] > row['impliedVolatility_PE'] else "Bearish",
+            "Level": determine_level(row.openInterest_CE, row.openInterest_PE),
+            "ChgOI_Bias": "Bullish" if row.changeinOpenInterest_CE < row.changeinOpenInterest_PE else "Bearish",
+            "Volume_Bias": "Bullish" if row.totalTradedVolume_CE < row.totalTradedVolume_PE else "Bearish",
+            "Gamma_Bias": "Bullish" if row.Gamma_CE < row.Gamma_PE else "Bearish",
+            "AskQty_Bias": "Bullish" if row.askQty_PE > row.askQty_CE else "Bearish",
+            "BidQty_Bias": "Bearish" if row.bidQty_PE > row.bidQty_CE else "Bullish",
+            "IV_Bias": "Bullish" if row.impliedVolatility_CE > row.impliedVolatility_PE else "Bearish",
             "DVP_Bias": delta_volume_bias(
-                row['lastPrice_CE'] - row['lastPrice_PE'],
-                row['totalTradedVolume_CE'] - row['totalTradedVolume_PE'],
-                row['changeinOpenInterest_CE'] - row['changeinOpenInterest_PE']
+                row.lastPrice_CE - row.lastPrice_PE,
+                row.totalTradedVolume_CE - row.totalTradedVolume_PE,
+                row.changeinOpenInterest_CE - row.changeinOpenInterest_PE
             )
         }
 
@@ -158,7 +160,7 @@ def expiry_bias_score(row):
 
 def get_support_resistance_zones(df, spot):
     """Calculate support and resistance zones"""
-    df['Level'] = df.apply(determine_level, axis=1)
+    df['Level'] = [determine_level(ce, pe) for ce, pe in zip(df['openInterest_CE'], df['openInterest_PE'])]
     support_strikes = df[df['Level'] == "Support"]['strikePrice'].tolist()
     resistance_strikes = df[df['Level'] == "Resistance"]['strikePrice'].tolist()
 
@@ -170,6 +172,25 @@ def get_support_resistance_zones(df, spot):
 
     return support_zone, resistance_zone
 
+@dataclass(frozen=True)
+class SRZones:
+    """Support/resistance zones with their display strings, computed once per refresh"""
+    support: tuple
+    resistance: tuple
+    support_str: str
+    resistance_str: str
+
+    @classmethod
+    def from_df(cls, df, spot):
+        """Build zones from the option chain (also sets df['Level'])"""
+        support_zone, resistance_zone = get_support_resistance_zones(df, spot)
+        return cls(
+            support=support_zone,
+            resistance=resistance_zone,
+            support_str=f"{support_zone[1]} to {support_zone[0]}" if all(support_zone) else "N/A",
+            resistance_str=f"{resistance_zone[0]} to {resistance_zone[1]}" if all(resistance_zone) else "N/A"
+        )
+
 def is_in_zone(spot, strike, level):
     """Check if spot is in zone"""
     if level == "Support":
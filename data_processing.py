@@ -9,39 +9,103 @@ from pytz import timezone
 import traceback
 import time as time_module
 
+# Shared NSE session, reused across reruns so cookies and connections persist
+NSE_SESSION = requests.Session()
+NSE_SESSION.headers.update({"User-Agent": "Mozilla/5.0"})
+
+# Last validated option chain payload and its HTTP validators
+_option_chain_cache = {'data': None, 'etag': None, 'last_modified': None}
+
+def _conditional_headers(cache):
+    """Build If-None-Match/If-Modified-Since headers for a cached payload"""
+    headers = {}
+    if cache['data'] is not None:
+        if cache['etag']:
+            headers['If-None-Match'] = cache['etag']
+        if cache['last_modified']:
+            headers['If-Modified-Since'] = cache['last_modified']
+    return headers
+
+# NSE answers these once its session cookies have expired
+NSE_AUTH_ERRORS = (401, 403)
+
+def _refresh_nse_session(session):
+    """Drop expired NSE cookies and cached validators, then re-fetch the homepage for fresh cookies"""
+    session.cookies.clear()
+    _option_chain_cache.update(data=None, etag=None, last_modified=None)
+    return fetch_with_retry(session, "https://www.nseindia.com", max_retries=3)
+
+# Narrow dtypes for the option chain columns read by the bias and level checks
+OPTION_CHAIN_DTYPES = {
+    'strikePrice': 'int32',
+    'openInterest_CE': 'float32', 'openInterest_PE': 'float32',
+    'changeinOpenInterest_CE': 'float32', 'changeinOpenInterest_PE': 'float32',
+    'totalTradedVolume_CE': 'int32', 'totalTradedVolume_PE': 'int32',
+    'askQty_CE': 'int32', 'askQty_PE': 'int32',
+    'bidQty_CE': 'int32', 'bidQty_PE': 'int32',
+    'impliedVolatility_CE': 'float32', 'impliedVolatility_PE': 'float32',
+    'lastPrice_CE': 'float32', 'lastPrice_PE': 'float32',
+}
+
+def downcast_option_chain(df):
+    """Downcast option chain columns to 32-bit dtypes to cut memory bandwidth"""
+    dtypes = {}
+    for col, dtype in OPTION_CHAIN_DTYPES.items():
+        if col in df.columns:
+            # Integer columns with gaps stay floating point
+            dtypes[col] = 'float32' if dtype == 'int32' and df[col].isna().any() else dtype
+    return df.astype(dtypes)
+
 @st.cache_data(ttl=60)  # Cache for 1 minute to improve performance
 def fetch_option_chain_data():
     """Fetch option chain data from NSE with enhanced resilience"""
     try:
-        headers = {"User-Agent": "Mozilla/5.0"}
-        session = requests.Session()
-        session.headers.update(headers)
+        session = NSE_SESSION
         
-        # Initialize NSE session with retry
-        session_response = fetch_with_retry(session, "https://www.nseindia.com", max_retries=3)
-        if not session_response:
-            return None, None, None
+        # Initialize NSE cookies with retry (only needed once per session)
+        if not session.cookies:
+            session_response = _refresh_nse_session(session)
+            if not session_response:
+                return None, None, None
         
-        # Fetch option chain data with retry
+        # Fetch option chain data with retry, letting NSE answer 304 if unchanged
         url = "https://www.nseindia.com/api/option-chain-indices?symbol=NIFTY"
-        response = fetch_with_retry(session, url, max_retries=3)
+        response = fetch_with_retry(session, url, max_retries=3,
+                                    headers=_conditional_headers(_option_chain_cache),
+                                    ok_statuses=(200, 304) + NSE_AUTH_ERRORS)
+        
+        # Cookies expired: bootstrap a fresh session and retry once
+        if response is not None and response.status_code in NSE_AUTH_ERRORS:
+            if not _refresh_nse_session(session):
+                return None, None, None
+            response = fetch_with_retry(session, url, max_retries=3)
+        
         if not response:
             return None, None, None
-            
-        data = response.json()
         
-        # Enhanced data validation
-        if not data or 'records' not in data:
-            st.error("❌ Malformed API response - missing records")
-            return None, None, None
+        if response.status_code == 304:
+            data = _option_chain_cache['data']
+        else:
+            data = response.json()
             
-        if 'data' not in data['records']:
-            st.error("❌ Malformed API response - missing data in records")
-            return None, None, None
+            # Enhanced data validation
+            if not data or 'records' not in data:
+                st.error("❌ Malformed API response - missing records")
+                return None, None, None
+                
+            if 'data' not in data['records']:
+                st.error("❌ Malformed API response - missing data in records")
+                return None, None, None
+                
+            if not data['records']['data']:
+                st.error("❌ Empty option chain data received")
+                return None, None, None
             
-        if not data['records']['data']:
-            st.error("❌ Empty option chain data received")
-            return None, None, None
+            _option_chain_cache.update(
+                data=data,
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified')
+            )
         
         # Get previous close data with retry
         prev_close_url = "https://www.nseindia.com/api/equity-stockIndices?index=NIFTY%2050"
@@ -74,12 +138,12 @@ def fetch_option_chain_data():
             
         return None, None, None
 
-def fetch_with_retry(session, url, max_retries=3, timeout=10):
+def fetch_with_retry(session, url, max_retries=3, timeout=10, headers=None, ok_statuses=(200,)):
     """Fetch URL with exponential backoff retry"""
     for attempt in range(max_retries):
         try:
-            response = session.get(url, timeout=timeout)
-            if response.status_code == 200:
+            response = session.get(url, timeout=timeout, headers=headers)
+            if response.status_code in ok_statuses:
                 return response
             else:
                 st.warning(f"⚠️ API returned status {response.status_code}, attempt {attempt + 1}")
@@ -167,7 +231,7 @@ def process_option_data(data, prev_close, underlying, expiry, T, r):
             st.error("❌ No matching strikes found between CE and PE")
             return pd.DataFrame()
         
-        df = df.sort_values('strikePrice')
+        df = downcast_option_chain(df.sort_values('strikePrice'))
         return df
         
     except Exception as e:
@@ -219,7 +283,7 @@ def detect_liquidity_zones(df, spot_price, price_history):
         unique_strikes = df['strikePrice'].unique()
         
         for strike in unique_strikes:
-            if not isinstance(strike, (int, float)) or strike <= 0:
+            if not isinstance(strike, (int, float, np.integer, np.floating)) or strike <= 0:
                 continue
                 
             revisit_count = sum((abs(spot - strike) <= 10) for spot in price_history if isinstance(spot, (int, float)))
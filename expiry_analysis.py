@@ -2,8 +2,9 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 from pytz import timezone
-from analysis_functions import expiry_bias_score, expiry_entry_signal, determine_level, get_support_resistance_zones
+from analysis_functions import expiry_bias_score, expiry_entry_signal, SRZones
 from telegram_notifications import send_telegram_message, send_expiry_day_signal
+from ui_components import append_to_log, append_price_point
 
 def is_expiry_day(today, expiry_date):
     """Check if today is expiry day"""
@@ -47,9 +48,7 @@ def handle_expiry_day_analysis(data, expiry, underlying, prev_close, now):
     send_telegram_message("⚠️ Expiry Day Detected. Using special expiry analysis.")
     
     # Store spot history for expiry day
-    current_time_str = now.strftime("%H:%M:%S")
-    new_row = pd.DataFrame([[current_time_str, underlying]], columns=["Time", "Spot"])
-    st.session_state['price_data'] = pd.concat([st.session_state['price_data'], new_row], ignore_index=True)
+    append_price_point(underlying, now)
     
     st.markdown(f"### 📍 Spot Price: {underlying}")
     
@@ -60,16 +59,16 @@ def handle_expiry_day_analysis(data, expiry, underlying, prev_close, now):
     # Get ATM strike and filter for ATM ±2 strikes
     df = filter_atm_strikes(df, underlying)
     
+    # Get support/resistance zones for target calculation (also sets df['Level'])
+    sr_zones = SRZones.from_df(df, underlying)
+    st.session_state.sr_zones = sr_zones
+    st.session_state.support_zone = sr_zones.support
+    st.session_state.resistance_zone = sr_zones.resistance
+    
     # Get support/resistance levels
-    df['Level'] = df.apply(determine_level, axis=1)
     support_strikes = df[df['Level'] == "Support"]['strikePrice'].unique()
     resistance_strikes = df[df['Level'] == "Resistance"]['strikePrice'].unique()
     
-    # Get support/resistance zones for target calculation
-    support_zone, resistance_zone = get_support_resistance_zones(df, underlying)
-    st.session_state.support_zone = support_zone
-    st.session_state.resistance_zone = resistance_zone
-    
     # Generate expiry day signals with S/R based targets
     expiry_signals = expiry_entry_signal(df, support_strikes, resistance_strikes)
     
@@ -88,7 +87,7 @@ def display_expiry_signals(expiry_signals, underlying, now):
             """)
             
             # Add to trade log with S/R based targets
-            st.session_state.trade_log.append({
+            append_to_log('trade_log', {
                 "Time": now.strftime("%H:%M:%S"),
                 "Strike": signal['strike'],
                 "Type": 'CE' if 'CALL' in signal['type'] else 'PE',
@@ -1,16 +1,27 @@
 import streamlit as st
-from streamlit_autorefresh import st_autorefresh
 import pandas as pd
 import numpy as np
 from datetime import datetime, time
 from pytz import timezone
 import traceback
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import math
 from scipy.stats import norm
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import io
+import os
+import atexit
+from functools import lru_cache
+
+# Interactive confirm/skip bot is an optional module; the basic bot controls work without it
+try:
+    from telegram_interactive_bot import TelegramInteractiveBot
+    INTERACTIVE_BOT_AVAILABLE = True
+except ImportError:
+    INTERACTIVE_BOT_AVAILABLE = False
 
 # ===================================================================
 # STREAMLIT CLOUD COMPATIBLE VERSION
@@ -59,6 +70,19 @@ def initialize_streamlit_config():
 # TELEGRAM NOTIFICATIONS MODULE
 # ===================================================================
 
+# Bot API root; TG_API_BASE can point at a local telegram-bot-api server
+TG_BASE = os.environ.get("TG_API_BASE", "https://api.telegram.org").rstrip("/")
+
+# Shared keep-alive session so repeated alerts reuse one TCP+TLS connection
+_TELEGRAM_SESSION = requests.Session()
+_TELEGRAM_ADAPTER = HTTPAdapter(
+    pool_connections=4, pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+)
+_TELEGRAM_SESSION.mount("https://", _TELEGRAM_ADAPTER)
+_TELEGRAM_SESSION.mount("http://", _TELEGRAM_ADAPTER)
+atexit.register(_TELEGRAM_SESSION.close)
+
 def get_telegram_credentials():
     """Get Telegram credentials from Streamlit secrets"""
     try:
@@ -77,11 +101,11 @@ def send_telegram_message(message):
         st.warning("⚠️ Telegram credentials not configured")
         return False
         
-    url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
+    url = f"{TG_BASE}/bot{bot_token}/sendMessage"
     data = {"chat_id": chat_id, "text": message}
     
     try:
-        response = requests.post(url, data=data, timeout=10)
+        response = _TELEGRAM_SESSION.post(url, data=data, timeout=10)
         return response.status_code == 200
     except Exception as e:
         st.warning(f"⚠️ Telegram error: {e}")
@@ -91,26 +115,55 @@ def send_telegram_message(message):
 # DATA PROCESSING MODULE
 # ===================================================================
 
+# Shared NSE session, reused across reruns so cookies and connections persist
+NSE_SESSION = requests.Session()
+NSE_SESSION.headers.update({"User-Agent": "Mozilla/5.0"})
+
+# Last validated option chain payload and its ETag, for conditional GETs
+_option_chain_cache = {'data': None, 'etag': None}
+
+# NSE answers these once its session cookies have expired
+NSE_AUTH_ERRORS = (401, 403)
+
+def refresh_nse_session(session):
+    """Drop expired NSE cookies and the cached ETag, then re-fetch the homepage for fresh cookies"""
+    session.cookies.clear()
+    _option_chain_cache.update(data=None, etag=None)
+    session.get("https://www.nseindia.com", timeout=5)
+
 @st.cache_data(ttl=60)
 def fetch_option_chain_data():
     """Fetch option chain data from NSE"""
     try:
-        headers = {"User-Agent": "Mozilla/5.0"}
-        session = requests.Session()
-        session.headers.update(headers)
+        session = NSE_SESSION
         
-        # Initialize NSE session
-        session.get("https://www.nseindia.com", timeout=5)
+        # Initialize NSE session cookies once
+        if not session.cookies:
+            refresh_nse_session(session)
         
-        # Fetch option chain data
+        # Fetch option chain data, letting NSE answer 304 if unchanged
         url = "https://www.nseindia.com/api/option-chain-indices?symbol=NIFTY"
-        response = session.get(url, timeout=10)
-        data = response.json()
-        
-        # Validate data
-        if not data or 'records' not in data or 'data' not in data['records']:
-            st.error("❌ Invalid data received from NSE")
-            return None, None, None
+        headers = {}
+        if _option_chain_cache['data'] is not None and _option_chain_cache['etag']:
+            headers['If-None-Match'] = _option_chain_cache['etag']
+        response = session.get(url, timeout=10, headers=headers)
+        
+        # Cookies expired: bootstrap a fresh session and retry once
+        if response.status_code in NSE_AUTH_ERRORS:
+            refresh_nse_session(session)
+            response = session.get(url, timeout=10)
+        
+        if response.status_code == 304:
+            data = _option_chain_cache['data']
+        else:
+            data = response.json()
+            
+            # Validate data
+            if not data or 'records' not in data or 'data' not in data['records']:
+                st.error("❌ Invalid data received from NSE")
+                return None, None, None
+            
+            _option_chain_cache.update(data=data, etag=response.headers.get('ETag'))
         
         # Get previous close data
         try:
@@ -168,6 +221,28 @@ def calculate_greeks(option_type, S, K, T, r, sigma):
 # ANALYSIS FUNCTIONS MODULE
 # ===================================================================
 
+# Narrow dtypes for the option chain columns read by the bias and level checks
+OPTION_CHAIN_DTYPES = {
+    'strikePrice': 'int32',
+    'openInterest_CE': 'float32', 'openInterest_PE': 'float32',
+    'changeinOpenInterest_CE': 'float32', 'changeinOpenInterest_PE': 'float32',
+    'totalTradedVolume_CE': 'int32', 'totalTradedVolume_PE': 'int32',
+    'askQty_CE': 'int32', 'askQty_PE': 'int32',
+    'bidQty_CE': 'int32', 'bidQty_PE': 'int32',
+    'impliedVolatility_CE': 'float32', 'impliedVolatility_PE': 'float32',
+    'lastPrice_CE': 'float32', 'lastPrice_PE': 'float32',
+}
+
+def downcast_option_chain(df):
+    """Downcast option chain columns to 32-bit dtypes to cut memory bandwidth"""
+    dtypes = {}
+    for col, dtype in OPTION_CHAIN_DTYPES.items():
+        if col in df.columns:
+            # Integer columns with gaps stay floating point
+            dtypes[col] = 'float32' if dtype == 'int32' and df[col].isna().any() else dtype
+    return df.astype(dtypes)
+
+@lru_cache(maxsize=64)
 def final_verdict(score):
     """Convert numerical score to market verdict"""
     if score >= 4:
@@ -181,18 +256,18 @@ def final_verdict(score):
     else:
         return "Neutral"
 
-def determine_level(row):
-    """Determine if strike is support or resistance"""
-    if row['openInterest_PE'] > 1.12 * row['openInterest_CE']:
+def determine_level(oi_ce, oi_pe):
+    """Determine if strike is support or resistance from CE/PE open interest"""
+    if oi_pe > 1.12 * oi_ce:
         return "Support"
-    elif row['openInterest_CE'] > 1.12 * row['openInterest_PE']:
+    elif oi_ce > 1.12 * oi_pe:
         return "Resistance"
     else:
         return "Neutral"
 
 def get_support_resistance_zones(df, spot):
     """Calculate support and resistance zones"""
-    df['Level'] = df.apply(determine_level, axis=1)
+    df['Level'] = [determine_level(ce, pe) for ce, pe in zip(df['openInterest_CE'], df['openInterest_PE'])]
     support_strikes = df[df['Level'] == "Support"]['strikePrice'].tolist()
     resistance_strikes = df[df['Level'] == "Resistance"]['strikePrice'].tolist()
 
@@ -208,6 +283,25 @@ def get_support_resistance_zones(df, spot):
 # UI COMPONENTS MODULE
 # ===================================================================
 
+def append_to_log(log_key, entry):
+    """Append an entry to a session-state log and mark its DataFrame view stale"""
+    st.session_state[log_key].append(entry)
+    st.session_state[f"_{log_key}_dirty"] = True
+
+def get_log_df(log_key):
+    """Return the DataFrame view of a session-state log, rebuilt only when it changed"""
+    records = st.session_state[log_key]
+    df_key, dirty_key = f"_{log_key}_df", f"_{log_key}_dirty"
+    cached = st.session_state.get(df_key)
+    
+    # Rebuild when flagged dirty or when the list was appended to directly
+    if cached is None or st.session_state.get(dirty_key, True) or len(cached) != len(records):
+        cached = pd.DataFrame(records)
+        st.session_state[df_key] = cached
+        st.session_state[dirty_key] = False
+    
+    return cached
+
 def display_enhanced_trade_log():
     """Display enhanced trade log"""
     if not st.session_state.trade_log:
@@ -215,7 +309,7 @@ def display_enhanced_trade_log():
         return
         
     st.markdown("### 📜 Trade Log")
-    df_trades = pd.DataFrame(st.session_state.trade_log)
+    df_trades = get_log_df('trade_log').copy()
     
     # Add simulated P&L
     if 'Current_Price' not in df_trades.columns:
@@ -323,13 +417,18 @@ def setup_sidebar_controls():
             st.session_state.refresh_interval = refresh_interval * 1000
             st.success(f"✅ Refresh set to {refresh_interval} seconds")
 
-    # Apply auto-refresh only on Analysis page
-    if st.session_state.current_page == "Analysis":
-        st_autorefresh(
-            interval=st.session_state.refresh_interval, 
-            key="data_refresh", 
-            limit=100
-        )
+# Labels indexed by kernel code + 1 (codes are -1, 0, 1)
+ZONE_LABELS = np.array(['ITM', 'ATM', 'OTM'])
+VERDICT_LABELS = np.array(['Bearish', 'Neutral', 'Bullish'])
+
+def score_bias_kernel(strike, chg_oi_ce, chg_oi_pe, vol_ce, vol_pe, ask_ce, ask_pe, atm_strike, underlying):
+    """Compute bias score, zone code and verdict code for every strike at once"""
+    scores = ((chg_oi_ce < chg_oi_pe).astype(np.int8)
+              + (vol_ce < vol_pe)
+              + (ask_pe > ask_ce))
+    zones = np.where(strike == atm_strike, 0, np.where(strike > underlying, 1, -1))
+    verdicts = np.where(scores >= 2, 1, np.where(scores <= 0, -1, 0))
+    return scores, zones, verdicts
 
 def process_basic_analysis(data, underlying):
     """Process basic option chain analysis"""
@@ -349,42 +448,31 @@ def process_basic_analysis(data, underlying):
         df_ce = pd.DataFrame(calls)
         df_pe = pd.DataFrame(puts)
         df = pd.merge(df_ce, df_pe, on='strikePrice', suffixes=('_CE', '_PE')).sort_values('strikePrice')
+        df = downcast_option_chain(df)
 
         # Get ATM strike
         atm_strike = min(df['strikePrice'], key=lambda x: abs(x - underlying))
         df_filtered = df[df['strikePrice'].between(atm_strike - 200, atm_strike + 200)]
 
-        # Simple bias calculation
-        total_score = 0
-        bias_results = []
-        
-        for _, row in df_filtered.iterrows():
-            if abs(row['strikePrice'] - atm_strike) > 100:
-                continue
-                
-            # Simple bias scoring
-            score = 0
-            if row['changeinOpenInterest_CE'] < row['changeinOpenInterest_PE']:
-                score += 1
-            if row['totalTradedVolume_CE'] < row['totalTradedVolume_PE']:
-                score += 1
-            if row['askQty_PE'] > row['askQty_CE']:
-                score += 1
-            
-            zone = 'ATM' if row['strikePrice'] == atm_strike else 'OTM' if row['strikePrice'] > underlying else 'ITM'
-            
-            bias_results.append({
-                "Strike": row['strikePrice'],
-                "Zone": zone,
-                "Level": determine_level(row),
-                "BiasScore": score,
-                "Verdict": "Bullish" if score >= 2 else "Bearish" if score <= 0 else "Neutral"
-            })
-            
-            total_score += score
+        # Simple bias calculation over the ATM ±100 strikes in one vectorized pass
+        near_atm = df_filtered[(df_filtered['strikePrice'] - atm_strike).abs() <= 100]
+        scores, zones, verdicts = score_bias_kernel(
+            near_atm['strikePrice'].to_numpy(),
+            near_atm['changeinOpenInterest_CE'].to_numpy(), near_atm['changeinOpenInterest_PE'].to_numpy(),
+            near_atm['totalTradedVolume_CE'].to_numpy(), near_atm['totalTradedVolume_PE'].to_numpy(),
+            near_atm['askQty_CE'].to_numpy(), near_atm['askQty_PE'].to_numpy(),
+            atm_strike, underlying
+        )
+        total_score = int(scores.sum())
 
         market_view = final_verdict(total_score)
-        df_summary = pd.DataFrame(bias_results)
+        df_summary = pd.DataFrame({
+            "Strike": near_atm['strikePrice'].to_numpy(),
+            "Zone": ZONE_LABELS[zones + 1],
+            "Level": [determine_level(ce, pe) for ce, pe in zip(near_atm['openInterest_CE'], near_atm['openInterest_PE'])],
+            "BiasScore": scores,
+            "Verdict": VERDICT_LABELS[verdicts + 1]
+        })
         
         return df_filtered, df_summary, total_score, market_view
 
@@ -393,7 +481,13 @@ def process_basic_analysis(data, underlying):
         return None, None, None, "Error"
 
 def render_analysis_page():
-    """Render the main analysis page"""
+    """Render the main analysis page as a timed fragment"""
+    # Only the analysis block reruns on each refresh; navigation and sidebar stay static
+    analysis_fragment = st.fragment(run_every=st.session_state.refresh_interval / 1000)(render_live_analysis)
+    analysis_fragment()
+
+def render_live_analysis():
+    """Fetch option chain data and render the live analysis"""
     if not is_market_open():
         st.warning("📴 Market is closed. Take rest and recharge! 🎯")
         st.info("Market hours: 9:00 AM - 6:40 PM IST, Monday-Friday")
@@ -492,17 +586,18 @@ def render_simulator_page():
             "Qty": quantity,
             "Time": datetime.now().strftime("%H:%M:%S")
         }
-        st.session_state.simulated_trades.append(trade)
+        append_to_log('simulated_trades', trade)
         st.success("✅ Trade added to simulation!")
     
     if st.session_state.simulated_trades:
         st.markdown("### 📊 Simulated Trades")
-        st.dataframe(pd.DataFrame(st.session_state.simulated_trades))
+        st.dataframe(get_log_df('simulated_trades'))
 
-def render_bot_page():
-    """Render basic bot page"""
+def render_bot_page(bot=None):
+    """Render basic bot page, plus polling controls when the interactive bot is available"""
     st.markdown("## 🤖 Telegram Bot")
-    st.info("📱 Basic bot controls - Full interactive features require separate modules")
+    if bot is None:
+        st.info("📱 Basic bot controls - Full interactive features require separate modules")
     
     col1, col2 = st.columns(2)
     
@@ -526,34 +621,63 @@ def render_bot_page():
             st.success("Message sent!")
         else:
             st.error("Failed to send!")
+    
+    if bot is not None:
+        render_interactive_bot_controls(bot)
+
+def render_interactive_bot_controls(bot):
+    """Start/stop callback polling and show trades awaiting confirmation"""
+    st.markdown("### 📲 Trade Confirmations")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("▶️ Start Polling", disabled=st.session_state.bot_active, use_container_width=True):
+            st.session_state.bot_active = True
+            bot.start_polling()
+            st.rerun()
+    with col2:
+        if st.button("⏹️ Stop Polling", disabled=not st.session_state.bot_active, use_container_width=True):
+            st.session_state.bot_active = False
+            bot.stop_polling()
+            st.rerun()
+    
+    st.caption("🟢 Listening for button presses" if bot.is_polling() else "🔴 Not polling")
+    
+    pending = bot.session_pending()
+    if pending.empty:
+        st.info("📝 No trades awaiting confirmation")
+    else:
+        st.dataframe(pending)
+
+# Sample sentiment data and its score array, built once at import
+SAMPLE_NEWS = [
+    {"title": "Nifty hits fresh highs on strong FII flows", "sentiment": 0.8, "source": "Market News"},
+    {"title": "RBI maintains repo rate in policy review", "sentiment": 0.1, "source": "Economic Times"},
+    {"title": "Banking stocks surge on earnings optimism", "sentiment": 0.6, "source": "MoneyControl"},
+    {"title": "IT sector faces headwinds from US concerns", "sentiment": -0.3, "source": "Financial Express"}
+]
+SAMPLE_SENTIMENTS = np.fromiter((n["sentiment"] for n in SAMPLE_NEWS), dtype=np.float32, count=len(SAMPLE_NEWS))
 
 def render_sentiment_page():
     """Render basic sentiment page"""
     st.markdown("## 📰 Market Sentiment")
     st.info("📊 Basic sentiment display - Full analysis requires separate modules")
     
-    # Sample sentiment data
-    sample_news = [
-        {"title": "Nifty hits fresh highs on strong FII flows", "sentiment": 0.8, "source": "Market News"},
-        {"title": "RBI maintains repo rate in policy review", "sentiment": 0.1, "source": "Economic Times"},
-        {"title": "Banking stocks surge on earnings optimism", "sentiment": 0.6, "source": "MoneyControl"},
-        {"title": "IT sector faces headwinds from US concerns", "sentiment": -0.3, "source": "Financial Express"}
-    ]
-    
-    avg_sentiment = sum(item["sentiment"] for item in sample_news) / len(sample_news)
+    sentiments = SAMPLE_SENTIMENTS
+    avg_sentiment = float(sentiments.mean())
     
     col1, col2, col3 = st.columns(3)
     with col1:
         st.metric("📊 Sentiment Score", f"{avg_sentiment:+.2f}")
     with col2:
-        positive_news = len([n for n in sample_news if n["sentiment"] > 0.1])
+        positive_news = int((sentiments > 0.1).sum())
         st.metric("🟢 Positive News", positive_news)
     with col3:
-        negative_news = len([n for n in sample_news if n["sentiment"] < -0.1])
+        negative_news = int((sentiments < -0.1).sum())
         st.metric("🔴 Negative News", negative_news)
     
     st.markdown("### 📰 Sample Headlines")
-    for news in sample_news:
+    for news in SAMPLE_NEWS:
         sentiment_color = "🟢" if news["sentiment"] > 0.1 else "🔴" if news["sentiment"] < -0.1 else "🟡"
         st.write(f"{sentiment_color} **{news['title']}** ({news['sentiment']:+.1f}) - *{news['source']}*")
 
@@ -582,6 +706,11 @@ def main():
             if st.session_state.last_update_time:
                 st.caption(f"Last update: {st.session_state.last_update_time}")
         
+        # The interactive bot handles queued confirm/skip presses on every rerun while it is active
+        bot = None
+        if INTERACTIVE_BOT_AVAILABLE and (st.session_state.bot_active or current_page == "Bot"):
+            bot = TelegramInteractiveBot()
+        
         # Render pages
         if current_page == "Analysis":
             st.title("📊 Live Options Analysis")
@@ -591,7 +720,7 @@ def main():
             render_simulator_page()
         elif current_page == "Bot":
             st.title("🤖 Telegram Bot")
-            render_bot_page()
+            render_bot_page(bot)
         elif current_page == "Sentiment":
             st.title("📰 Market Sentiment")
             render_sentiment_page()
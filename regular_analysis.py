@@ -1,11 +1,26 @@
 import streamlit as st
-import pandas as pd
+import numpy as np
+from enum import IntEnum
 from datetime import datetime
 from pytz import timezone
 from data_processing import process_option_data, sudden_liquidity_spike, detect_liquidity_zones
-from analysis_functions import calculate_bias_scores, reversal_score, get_support_resistance_zones, is_in_zone
+from analysis_functions import calculate_bias_scores, reversal_score, is_in_zone, SRZones
 from telegram_notifications import send_liquidity_spike_alert, send_trade_signal, send_reversal_alert
-from ui_components import display_market_summary, plot_price_with_sr
+from ui_components import display_market_summary, plot_price_with_sr, append_to_log, append_price_point, get_log_df
+
+class MarketView(IntEnum):
+    """Direction of the ATM verdict, compared numerically in signal checks"""
+    BEARISH = -1
+    NEUTRAL = 0
+    BULLISH = 1
+
+VERDICT_VIEWS = {
+    "Strong Bullish": MarketView.BULLISH,
+    "Bullish": MarketView.BULLISH,
+    "Neutral": MarketView.NEUTRAL,
+    "Bearish": MarketView.BEARISH,
+    "Strong Bearish": MarketView.BEARISH,
+}
 
 def handle_regular_trading_analysis(data, expiry, underlying, T, r, now):
     """Handle regular trading day analysis"""
@@ -22,22 +37,23 @@ def handle_regular_trading_analysis(data, expiry, underlying, T, r, now):
     # Check for liquidity spikes
     check_liquidity_spikes(df)
     
-    # Get support/resistance zones
-    support_zone, resistance_zone = get_support_resistance_zones(df, underlying)
-    st.session_state.support_zone = support_zone
-    st.session_state.resistance_zone = resistance_zone
+    # Get support/resistance zones once and share them downstream
+    sr_zones = SRZones.from_df(df, underlying)
+    st.session_state.sr_zones = sr_zones
+    st.session_state.support_zone = sr_zones.support
+    st.session_state.resistance_zone = sr_zones.resistance
     
     # Update price data
     update_price_data(underlying, now)
     
     # Generate trade signals
-    market_view = get_market_view(bias_results)
-    suggested_trade, signal_sent = generate_trade_signals(
-        bias_results, total_score, market_view, df, underlying, 
-        support_zone, resistance_zone, now
+    market_view, view_code = get_market_view(bias_results)
+    suggested_trade, option_type, signal_sent = generate_trade_signals(
+        bias_results, total_score, market_view, view_code, df, underlying, 
+        sr_zones, now
     )
     
-    return df, bias_results, total_score, market_view, suggested_trade, signal_sent
+    return df, bias_results, total_score, market_view, suggested_trade, option_type, signal_sent
 
 def check_liquidity_spikes(df):
     """Check for sudden liquidity spikes"""
@@ -47,31 +63,28 @@ def check_liquidity_spikes(df):
 
 def update_price_data(underlying, now):
     """Update price data in session state"""
-    current_time_str = now.strftime("%H:%M:%S")
-    new_row = pd.DataFrame([[current_time_str, underlying]], columns=["Time", "Spot"])
-    st.session_state['price_data'] = pd.concat([st.session_state['price_data'], new_row], ignore_index=True)
+    append_price_point(underlying, now)
 
 def get_market_view(bias_results):
-    """Get market view from ATM strike"""
+    """Get market view and its direction code from ATM strike"""
     atm_row = next((row for row in bias_results if row["Zone"] == "ATM"), None)
-    return atm_row['Verdict'] if atm_row else "Neutral"
+    market_view = atm_row['Verdict'] if atm_row else "Neutral"
+    return market_view, VERDICT_VIEWS.get(market_view, MarketView.NEUTRAL)
 
-def generate_trade_signals(bias_results, total_score, market_view, df, underlying, 
-                         support_zone, resistance_zone, now):
+def generate_trade_signals(bias_results, total_score, market_view, view_code, df, underlying, 
+                         sr_zones, now):
     """Generate trade signals based on analysis"""
     suggested_trade = ""
+    option_type = None
     signal_sent = False
     
-    support_str = f"{support_zone[1]} to {support_zone[0]}" if all(support_zone) else "N/A"
-    resistance_str = f"{resistance_zone[0]} to {resistance_zone[1]}" if all(resistance_zone) else "N/A"
-    
     for row in bias_results:
         if not is_in_zone(underlying, row['Strike'], row['Level']):
             continue
 
-        if row['Level'] == "Support" and total_score >= 4 and "Bullish" in market_view:
+        if row['Level'] == "Support" and total_score >= 4 and view_code > 0:
             option_type = 'CE'
-        elif row['Level'] == "Resistance" and total_score <= -4 and "Bearish" in market_view:
+        elif row['Level'] == "Resistance" and total_score <= -4 and view_code < 0:
             option_type = 'PE'
         else:
             continue
@@ -80,7 +93,7 @@ def generate_trade_signals(bias_results, total_score, market_view, df, underlyin
         iv = df.loc[df['strikePrice'] == row['Strike'], f'impliedVolatility_{option_type}'].values[0]
         
         # Calculate target based on S/R zones
-        target = calculate_target(option_type, row['Strike'], ltp, iv, support_zone, resistance_zone)
+        target = calculate_target(option_type, row['Strike'], ltp, iv, sr_zones.support, sr_zones.resistance)
         stop_loss = round(ltp * 0.8, 2)
 
         atm_signal = f"{'CALL' if option_type == 'CE' else 'PUT'} Entry (Bias Based at {row['Level']})"
@@ -88,10 +101,10 @@ def generate_trade_signals(bias_results, total_score, market_view, df, underlyin
 
         # Send alerts
         send_trade_signal(atm_signal, suggested_trade, total_score, market_view, 
-                         row, support_str, resistance_str, underlying, now)
+                         row, sr_zones.support_str, sr_zones.resistance_str, underlying, now)
 
         # Add to trade log
-        st.session_state.trade_log.append({
+        append_to_log('trade_log', {
             "Time": now.strftime("%H:%M:%S"),
             "Strike": row['Strike'],
             "Type": option_type,
@@ -103,7 +116,7 @@ def generate_trade_signals(bias_results, total_score, market_view, df, underlyin
         signal_sent = True
         break
     
-    return suggested_trade, signal_sent
+    return suggested_trade, option_type, signal_sent
 
 def calculate_target(option_type, strike, ltp, iv, support_zone, resistance_zone):
     """Calculate target price based on S/R zones"""
@@ -119,21 +132,19 @@ def calculate_target(option_type, strike, ltp, iv, support_zone, resistance_zone
     
     return target
 
-def display_regular_analysis_results(underlying, market_view, total_score, support_zone, 
-                                   resistance_zone, suggested_trade, df_summary, df, atm_strike):
+def display_regular_analysis_results(underlying, market_view, total_score, sr_zones, 
+                                   suggested_trade, df_summary, df, atm_strike,
+                                   option_type=None):
     """Display regular analysis results"""
-    support_str = f"{support_zone[1]} to {support_zone[0]}" if all(support_zone) else "N/A"
-    resistance_str = f"{resistance_zone[0]} to {resistance_zone[1]}" if all(resistance_zone) else "N/A"
-    
     # Display main summary
-    display_market_summary(underlying, market_view, total_score, support_str, resistance_str)
+    display_market_summary(underlying, market_view, total_score, sr_zones.support_str, sr_zones.resistance_str)
     
     # Display price chart
     plot_price_with_sr()
     
     # Display trade suggestion
     if suggested_trade:
-        atm_signal = "CALL Entry" if "CE" in suggested_trade else "PUT Entry"
+        atm_signal = "CALL Entry" if option_type == 'CE' else "PUT Entry"
         st.info(f"🔹 {atm_signal}\n{suggested_trade}")
     
     # Display option chain summary
@@ -143,7 +154,7 @@ def display_regular_analysis_results(underlying, market_view, total_score, suppo
     # Display trade log
     if st.session_state.trade_log:
         st.markdown("### 📜 Trade Log")
-        st.dataframe(pd.DataFrame(st.session_state.trade_log))
+        st.dataframe(get_log_df('trade_log'))
 
 def handle_reversal_analysis(df, atm_strike, underlying, now):
     """Handle reversal signal analysis"""
@@ -159,14 +170,17 @@ def handle_reversal_analysis(df, atm_strike, underlying, now):
         (df['strikePrice'] <= atm_strike + 100)
     ].sort_values('strikePrice')
     
-    # Show reversal table
+    # Show reversal table with a pre-rendered direction column instead of a Styler
+    direction = display_strikes['ReversalDirection'].to_numpy()
+    display_strikes = display_strikes.assign(
+        Direction=np.where(direction == "UP", "🟢 UP", np.where(direction == "DOWN", "🔴 DOWN", "—"))
+    )
     st.dataframe(
-        display_strikes[['strikePrice', 'ReversalScore', 'ReversalDirection',
+        display_strikes[['strikePrice', 'ReversalScore', 'Direction',
                         'changeinOpenInterest_CE', 'changeinOpenInterest_PE',
                         'impliedVolatility_CE', 'impliedVolatility_PE']]
-        .sort_values("ReversalScore", ascending=False)
-        .style.apply(lambda x: ['color: green' if v == "UP" else 'color: red' if v == "DOWN" else '' 
-                              for v in x], subset=['ReversalDirection'])
+        .sort_values("ReversalScore", ascending=False),
+        column_config={'Direction': st.column_config.TextColumn("Direction")}
     )
     
     # Check ATM strike for alerts
@@ -1,10 +1,16 @@
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
 from pytz import timezone
 import re
 import time
+from collections import deque
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
@@ -23,11 +29,204 @@ except ImportError:
     TEXTBLOB_AVAILABLE = False
     st.warning("⚠️ TextBlob not available. Install: pip install textblob")
 
+try:
+    import feedparser
+    FEEDPARSER_AVAILABLE = True
+except ImportError:
+    FEEDPARSER_AVAILABLE = False
+    st.warning("⚠️ RSS parsing requires feedparser: pip install feedparser")
+
+try:
+    import lxml.html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+    st.warning("⚠️ lxml not available, falling back to regex headline parsing. Install: pip install lxml")
+
+# Shared pooled session for all news fetchers (keeps TCP/TLS connections alive)
+NEWS_SESSION = requests.Session()
+NEWS_SESSION.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+})
+_news_adapter = HTTPAdapter(pool_connections=10, pool_maxsize=10,
+                            max_retries=Retry(total=2, backoff_factor=0.2))
+NEWS_SESSION.mount('https://', _news_adapter)
+NEWS_SESSION.mount('http://', _news_adapter)
+
+RSS_FEEDS = [
+    'https://economictimes.indiatimes.com/markets/rssfeeds/1977021501.cms',
+    'https://www.moneycontrol.com/rss/business.xml'
+]
+
+POSITIVE_WORDS = [
+    'bullish', 'positive', 'growth', 'rally', 'surge', 'gain', 'rise',
+    'boom', 'strong', 'recovery', 'optimistic', 'uptrend', 'breakout'
+]
+
+NEGATIVE_WORDS = [
+    'bearish', 'negative', 'fall', 'decline', 'crash', 'drop', 'weak',
+    'recession', 'correction', 'selloff', 'pessimistic', 'downtrend'
+]
+
+# One pass over the text finds both positive and negative words (substring semantics, as before)
+_SENTIMENT_WORD_RE = re.compile(
+    '(?P<pos>' + '|'.join(map(re.escape, POSITIVE_WORDS)) + ')|'
+    '(?P<neg>' + '|'.join(map(re.escape, NEGATIVE_WORDS)) + ')'
+)
+
+# Runs of 4+ identical symbols/emoji are collapsed to 3 before VADER, which is very slow on them
+_SYMBOL_RUN_RE = re.compile(r'([^\w\s])\1{3,}')
+
+@st.cache_resource
+def get_vader_analyzer():
+    """VADER analyzer loaded once per process (reads the full lexicon)"""
+    return SentimentIntensityAnalyzer()
+
+@st.cache_resource
+def get_keyword_regex(keywords):
+    """Single precompiled substring matcher for market keywords (applied to lowercased text)"""
+    return re.compile('|'.join(re.escape(k.lower()) for k in keywords))
+
+@lru_cache(maxsize=4096)
+def vader_score(text):
+    """VADER compound score, memoized since refreshes re-score the same headlines"""
+    return get_vader_analyzer().polarity_scores(_SYMBOL_RUN_RE.sub(r'\1\1\1', text))['compound']
+
+@lru_cache(maxsize=4096)
+def textblob_score(text):
+    """TextBlob polarity, memoized since refreshes re-score the same headlines"""
+    return TextBlob(text).sentiment.polarity
+
+def simple_sentiment_score(text_lc):
+    """Simple rule-based sentiment score between -1 and 1 (expects lowercased text)"""
+    positive_found = set()
+    negative_found = set()
+    for match in _SENTIMENT_WORD_RE.finditer(text_lc):
+        if match.lastgroup == 'pos':
+            positive_found.add(match.group())
+        else:
+            negative_found.add(match.group())
+    
+    # Each distinct word counts once
+    positive_count = len(positive_found)
+    negative_count = len(negative_found)
+    
+    if positive_count + negative_count == 0:
+        return 0
+    
+    return (positive_count - negative_count) / (positive_count + negative_count)
+
+IST = timezone("Asia/Kolkata")
+MAX_RELEVANT_NEWS = 20
+SENTIMENT_HISTORY_MAXLEN = 288  # 24 hours at 5-minute refreshes
+
+# Parsed entries per feed URL with validators for conditional GETs
+_feed_cache = {}
+
+def _conditional_headers(cache):
+    """Build If-None-Match/If-Modified-Since headers for a cached feed"""
+    headers = {}
+    if cache.get('etag'):
+        headers['If-None-Match'] = cache['etag']
+    if cache.get('last_modified'):
+        headers['If-Modified-Since'] = cache['last_modified']
+    return headers
+
+NEWS_COLUMNS = ['title', 'source', 'timestamp', 'url', 'summary', 'sentiment_score', 'sentiment_label']
+
+def build_news_df(news_items):
+    """Column-oriented news table with the display defaults filled in"""
+    news_df = pd.DataFrame(news_items).reindex(columns=NEWS_COLUMNS)
+    return news_df.fillna({
+        'title': 'No title',
+        'source': 'Unknown',
+        'summary': '',
+        'sentiment_score': 0.0,
+        'sentiment_label': '🟡 Neutral'
+    })
+
+@st.cache_data(ttl=60)
+def build_sentiment_gauge(sentiment_score):
+    """Sentiment gauge figure, cached per (rounded) score across reruns"""
+    fig = go.Figure(go.Indicator(
+        mode = "gauge+number+delta",
+        value = sentiment_score,
+        domain = {'x': [0, 1], 'y': [0, 1]},
+        title = {'text': "Market Sentiment Score"},
+        delta = {'reference': 0},
+        gauge = {
+            'axis': {'range': [-1, 1]},
+            'bar': {'color': "darkblue"},
+            'steps': [
+                {'range': [-1, -0.3], 'color': "lightcoral"},
+                {'range': [-0.3, 0.3], 'color': "lightyellow"},
+                {'range': [0.3, 1], 'color': "lightgreen"}
+            ],
+            'threshold': {
+                'line': {'color': "red", 'width': 4},
+                'thickness': 0.75,
+                'value': 0
+            }
+        }
+    ))
+    
+    fig.update_layout(
+        height=300,
+        title="Current Market Sentiment",
+        template="plotly_white"
+    )
+    
+    return fig
+
+@st.cache_data(ttl=60)
+def build_sentiment_trends_figure(history_df):
+    """Sentiment trend figure, cached until the history changes"""
+    fig = go.Figure()
+    
+    # Add sentiment line
+    fig.add_trace(go.Scatter(
+        x=history_df['timestamp'],
+        y=history_df['sentiment_score'],
+        mode='lines+markers',
+        name='Sentiment Score',
+        line=dict(color='blue', width=2),
+        marker=dict(size=6)
+    ))
+    
+    # Add sentiment zones
+    fig.add_hline(y=0.3, line_dash="dash", line_color="green", 
+                 annotation_text="Positive Zone", annotation_position="right")
+    fig.add_hline(y=-0.3, line_dash="dash", line_color="red", 
+                 annotation_text="Negative Zone", annotation_position="right")
+    fig.add_hline(y=0, line_dash="dot", line_color="gray", 
+                 annotation_text="Neutral", annotation_position="right")
+    
+    # Fill sentiment zones
+    fig.add_shape(type="rect", xref="paper", yref="y",
+                 x0=0, x1=1, y0=0.3, y1=1,
+                 fillcolor="rgba(0,255,0,0.1)", line=dict(width=0))
+    fig.add_shape(type="rect", xref="paper", yref="y",
+                 x0=0, x1=1, y0=-1, y1=-0.3,
+                 fillcolor="rgba(255,0,0,0.1)", line=dict(width=0))
+    
+    fig.update_layout(
+        title="Market Sentiment Over Time",
+        xaxis_title="Time",
+        yaxis_title="Sentiment Score",
+        template="plotly_white",
+        height=400,
+        yaxis=dict(range=[-1, 1])
+    )
+    
+    return fig
+
 class MarketSentimentAnalyzer:
-    def __init__(self):
+    def __init__(self, enable_textblob=False):
         self.initialize_session_state()
-        if VADER_AVAILABLE:
-            self.vader_analyzer = SentimentIntensityAnalyzer()
+        self.enable_textblob = enable_textblob
+        
+        # Shared HTTP session used by all (concurrent) news fetchers
+        self.http = NEWS_SESSION
         
         # News sources and keywords
         self.market_keywords = [
@@ -36,45 +235,51 @@ class MarketSentimentAnalyzer:
             'crude oil', 'gold', 'banking', 'IT sector', 'pharma sector'
         ]
         
-        self.positive_words = [
-            'bullish', 'positive', 'growth', 'rally', 'surge', 'gain', 'rise',
-            'boom', 'strong', 'recovery', 'optimistic', 'uptrend', 'breakout'
-        ]
+        self.positive_words = POSITIVE_WORDS
+        self.negative_words = NEGATIVE_WORDS
         
-        self.negative_words = [
-            'bearish', 'negative', 'fall', 'decline', 'crash', 'drop', 'weak',
-            'recession', 'correction', 'selloff', 'pessimistic', 'downtrend'
-        ]
+        self._kw_re = get_keyword_regex(tuple(self.market_keywords))
+        
+        # Pick the combiner once: VADER by default, TextBlob opt-in, rule-based as fallback
+        use_textblob = self.enable_textblob and TEXTBLOB_AVAILABLE
+        if VADER_AVAILABLE and use_textblob:
+            self._combined = lambda content, content_lc: (vader_score(content) + textblob_score(content)) * 0.5
+        elif VADER_AVAILABLE:
+            self._combined = lambda content, content_lc: vader_score(content)
+        elif use_textblob:
+            self._combined = lambda content, content_lc: (simple_sentiment_score(content_lc) + textblob_score(content)) * 0.5
+        else:
+            self._combined = lambda content, content_lc: simple_sentiment_score(content_lc)
     
     def initialize_session_state(self):
         """Initialize sentiment analysis session state"""
-        if 'news_data' not in st.session_state:
-            st.session_state.news_data = []
-        if 'sentiment_history' not in st.session_state:
-            st.session_state.sentiment_history = []
+        if 'news_df' not in st.session_state:
+            st.session_state.news_df = build_news_df([])
+        if not isinstance(st.session_state.get('sentiment_history'), deque):
+            st.session_state.sentiment_history = deque(maxlen=SENTIMENT_HISTORY_MAXLEN)
         if 'last_news_fetch' not in st.session_state:
             st.session_state.last_news_fetch = None
         if 'current_sentiment_score' not in st.session_state:
             st.session_state.current_sentiment_score = 0
     
     def fetch_news_data(self, sources=['moneycontrol', 'economic_times']):
-        """Fetch news data from various sources"""
+        """Fetch news data from various sources concurrently"""
         all_news = []
-        
-        # Try multiple sources
-        for source in sources:
-            try:
-                if source == 'moneycontrol':
-                    news = self.fetch_moneycontrol_news()
-                elif source == 'economic_times':
-                    news = self.fetch_et_news()
-                elif source == 'rss_feeds':
-                    news = self.fetch_rss_news()
-                
-                all_news.extend(news)
-                
-            except Exception as e:
-                st.warning(f"⚠️ Failed to fetch {source} news: {str(e)}")
+        fetchers = {
+            'moneycontrol': self.fetch_moneycontrol_news,
+            'economic_times': self.fetch_et_news,
+            'rss_feeds': self.fetch_rss_news
+        }
+        
+        # Fetch all sources in parallel so wall time is the slowest source, not the sum
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            futures = [(source, pool.submit(fetchers[source])) for source in sources if source in fetchers]
+            
+            for source, future in futures:
+                try:
+                    all_news.extend(future.result())
+                except Exception as e:
+                    st.warning(f"⚠️ Failed to fetch {source} news: {str(e)}")
         
         # If no news fetched, use sample data
         if not all_news:
@@ -84,35 +289,32 @@ class MarketSentimentAnalyzer:
         filtered_news = self.filter_market_news(all_news)
         
         # Update session state
-        st.session_state.news_data = filtered_news
-        st.session_state.last_news_fetch = datetime.now(timezone("Asia/Kolkata"))
+        st.session_state.last_news_fetch = datetime.now(IST)
         
         return filtered_news
     
     def fetch_moneycontrol_news(self):
         """Fetch news from MoneyControl (simplified scraping)"""
-        # In production, use proper web scraping with BeautifulSoup
-        # This is a simplified example
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            
-            # Sample request (in real implementation, parse HTML)
             url = "https://www.moneycontrol.com/news/business/markets/"
-            response = requests.get(url, headers=headers, timeout=10)
+            response = self.http.get(url, timeout=10)
             
             if response.status_code == 200:
-                # Extract headlines using regex (simplified)
-                headlines = re.findall(r'<h2.*?>(.*?)</h2>', response.text)
+                # Extract headlines with lxml's C HTML parser (regex fallback)
+                if LXML_AVAILABLE:
+                    tree = lxml.html.fromstring(response.content)
+                    headlines = [h2.text_content() for h2 in tree.iter('h2')]
+                else:
+                    headlines = re.findall(r'<h2.*?>(.*?)</h2>', response.text)
                 
                 news_items = []
+                now = datetime.now(IST)
                 for headline in headlines[:10]:  # Top 10
-                    if any(keyword.lower() in headline.lower() for keyword in self.market_keywords):
+                    if self._kw_re.search(headline.lower()):
                         news_items.append({
                             'title': headline.strip(),
                             'source': 'MoneyControl',
-                            'timestamp': datetime.now(),
+                            'timestamp': now,
                             'url': url
                         })
                 
@@ -129,75 +331,89 @@ class MarketSentimentAnalyzer:
         return []
     
     def fetch_rss_news(self):
-        """Fetch news from RSS feeds"""
-        rss_feeds = [
-            'https://economictimes.indiatimes.com/markets/rssfeeds/1977021501.cms',
-            'https://www.moneycontrol.com/rss/business.xml'
-        ]
+        """Fetch news from RSS feeds concurrently"""
+        if not FEEDPARSER_AVAILABLE:
+            return []
         
+        with ThreadPoolExecutor(max_workers=len(RSS_FEEDS)) as pool:
+            feeds = list(pool.map(self.fetch_rss_feed, RSS_FEEDS))
+        
+        return [item for feed_items in feeds for item in feed_items]
+    
+    def fetch_rss_feed(self, feed_url):
+        """Fetch and parse a single RSS feed, reusing the parsed entries when unchanged"""
         news_items = []
+        cache = _feed_cache.get(feed_url, {})
         
-        for feed_url in rss_feeds:
-            try:
-                # In production, use feedparser library
-                # pip install feedparser
-                import feedparser
-                
-                feed = feedparser.parse(feed_url)
+        try:
+            response = self.http.get(feed_url, headers=_conditional_headers(cache), timeout=10)
+            
+            # Unchanged (304) or failed fetch - keep serving the last parsed entries
+            if response.status_code != 200:
+                return [dict(item) for item in cache.get('items', [])]
+            
+            # Parse the already-fetched bytes so feedparser does not fetch again
+            feed = feedparser.parse(response.content)
+            
+            now = datetime.now(IST)
+            for entry in feed.entries[:5]:  # Top 5 from each feed
+                news_items.append({
+                    'title': entry.title,
+                    'source': feed.feed.get('title', 'RSS Feed'),
+                    'timestamp': now,
+                    'url': entry.link,
+                    'summary': entry.get('summary', '')
+                })
+            
+            _feed_cache[feed_url] = {
+                'items': [dict(item) for item in news_items],
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified')
+            }
                 
-                for entry in feed.entries[:5]:  # Top 5 from each feed
-                    news_items.append({
-                        'title': entry.title,
-                        'source': feed.feed.get('title', 'RSS Feed'),
-                        'timestamp': datetime.now(),
-                        'url': entry.link,
-                        'summary': entry.get('summary', '')
-                    })
-                    
-            except ImportError:
-                st.warning("⚠️ RSS parsing requires feedparser: pip install feedparser")
-            except Exception as e:
-                continue
+        except Exception as e:
+            return []
         
         return news_items
     
     def get_sample_news(self):
         """Get sample news data for demo purposes"""
+        now = datetime.now(IST)
         sample_news = [
             {
                 'title': 'Nifty 50 hits fresh record high on strong FII inflows',
                 'source': 'Market News',
-                'timestamp': datetime.now() - timedelta(minutes=30),
+                'timestamp': now - timedelta(minutes=30),
                 'sentiment_score': 0.8
             },
             {
                 'title': 'RBI maintains repo rate at 6.5% in policy review',
                 'source': 'Economic Times',
-                'timestamp': datetime.now() - timedelta(hours=1),
+                'timestamp': now - timedelta(hours=1),
                 'sentiment_score': 0.2
             },
             {
                 'title': 'Banking stocks surge on positive Q3 earnings outlook',
                 'source': 'MoneyControl',
-                'timestamp': datetime.now() - timedelta(hours=2),
+                'timestamp': now - timedelta(hours=2),
                 'sentiment_score': 0.6
             },
             {
                 'title': 'Crude oil prices decline amid global economic concerns',
                 'source': 'Business Standard',
-                'timestamp': datetime.now() - timedelta(hours=3),
+                'timestamp': now - timedelta(hours=3),
                 'sentiment_score': -0.4
             },
             {
                 'title': 'IT sector faces headwinds from US recession fears',
                 'source': 'Financial Express',
-                'timestamp': datetime.now() - timedelta(hours=4),
+                'timestamp': now - timedelta(hours=4),
                 'sentiment_score': -0.3
             },
             {
                 'title': 'Government announces new infrastructure spending package',
                 'source': 'Economic Survey',
-                'timestamp': datetime.now() - timedelta(hours=5),
+                'timestamp': now - timedelta(hours=5),
                 'sentiment_score': 0.5
             }
         ]
@@ -209,73 +425,48 @@ class MarketSentimentAnalyzer:
         filtered_news = []
         
         for item in news_items:
-            title = item.get('title', '').lower()
-            summary = item.get('summary', '').lower()
-            content = title + ' ' + summary
+            # Lowercase once; the cached copy is reused by the rule-based scorer
+            content = item['_lc'] = (item.get('title', '') + ' ' + item.get('summary', '')).lower()
             
             # Check if news is market-related
-            if any(keyword.lower() in content for keyword in self.market_keywords):
+            if self._kw_re.search(content):
                 filtered_news.append(item)
+                if len(filtered_news) >= MAX_RELEVANT_NEWS:
+                    break  # Top 20 relevant news, stop scanning
         
-        return filtered_news[:20]  # Top 20 relevant news
+        return filtered_news
     
     def analyze_sentiment_vader(self, text):
         """Analyze sentiment using VADER"""
         if not VADER_AVAILABLE:
             return 0
         
-        scores = self.vader_analyzer.polarity_scores(text)
-        return scores['compound']  # Returns score between -1 and 1
+        return vader_score(text)  # Returns score between -1 and 1
     
     def analyze_sentiment_textblob(self, text):
         """Analyze sentiment using TextBlob"""
         if not TEXTBLOB_AVAILABLE:
             return 0
         
-        blob = TextBlob(text)
-        return blob.sentiment.polarity  # Returns score between -1 and 1
+        return textblob_score(text)  # Returns score between -1 and 1
     
     def analyze_sentiment_simple(self, text):
         """Simple rule-based sentiment analysis"""
-        text = text.lower()
-        
-        positive_count = sum(1 for word in self.positive_words if word in text)
-        negative_count = sum(1 for word in self.negative_words if word in text)
-        
-        # Calculate simple sentiment score
-        if positive_count + negative_count == 0:
-            return 0
-        
-        sentiment_score = (positive_count - negative_count) / (positive_count + negative_count)
-        return sentiment_score
+        return simple_sentiment_score(text.lower())
+    
+    def score_content(self, content, content_lc):
+        """Average the available sentiment scores for one piece of text"""
+        return self._combined(content, content_lc)
     
     def analyze_news_sentiment(self, news_items):
         """Analyze sentiment for all news items"""
-        analyzed_news = []
+        contents = [item.get('title', '') + ' ' + item.get('summary', '') for item in news_items]
+        contents_lc = [item.get('_lc') or content.lower() for item, content in zip(news_items, contents)]
         
-        for item in news_items:
-            title = item.get('title', '')
-            summary = item.get('summary', '')
-            content = title + ' ' + summary
-            
-            # Try multiple sentiment analysis methods
-            sentiments = []
-            
-            if VADER_AVAILABLE:
-                vader_score = self.analyze_sentiment_vader(content)
-                sentiments.append(vader_score)
-            
-            if TEXTBLOB_AVAILABLE:
-                textblob_score = self.analyze_sentiment_textblob(content)
-                sentiments.append(textblob_score)
-            
-            # Always include simple analysis as fallback
-            simple_score = self.analyze_sentiment_simple(content)
-            sentiments.append(simple_score)
-            
-            # Average the sentiment scores
-            avg_sentiment = sum(sentiments) / len(sentiments) if sentiments else 0
-            
+        scores = [self.score_content(content, content_lc) for content, content_lc in zip(contents, contents_lc)]
+        
+        analyzed_news = []
+        for item, avg_sentiment in zip(news_items, scores):
             # Add sentiment to news item
             item['sentiment_score'] = round(avg_sentiment, 3)
             item['sentiment_label'] = self.get_sentiment_label(avg_sentiment)
@@ -299,43 +490,39 @@ class MarketSentimentAnalyzer:
             return 0, "🟡 Neutral"
         
         # Weight recent news more heavily
-        now = datetime.now(timezone("Asia/Kolkata"))
-        weighted_scores = []
-        
-        for item in analyzed_news:
-            timestamp = item.get('timestamp', now)
-            if isinstance(timestamp, str):
-                timestamp = datetime.fromisoformat(timestamp)
-            
-            # Calculate time weight (more recent = higher weight)
-            hours_ago = (now - timestamp).total_seconds() / 3600
-            time_weight = max(0.1, 1 / (1 + hours_ago * 0.1))  # Exponential decay
-            
-            sentiment_score = item.get('sentiment_score', 0)
-            weighted_scores.append(sentiment_score * time_weight)
-        
-        overall_sentiment = sum(weighted_scores) / len(weighted_scores)
+        now = datetime.now(IST)
+        
+        timestamps = [item.get('timestamp', now) for item in analyzed_news]
+        timestamps = [datetime.fromisoformat(t) if isinstance(t, str) else t for t in timestamps]
+        # Items are stamped in IST at the source; any naive value is server-local time, not IST
+        hours_ago = np.array([
+            (now - (t if t.tzinfo else t.astimezone())).total_seconds() for t in timestamps
+        ]) / 3600
+        hours_ago = np.maximum(hours_ago, 0)  # Clock skew must not push weights above 1
+        
+        # Calculate time weights (more recent = higher weight) and apply them in one pass
+        time_weights = np.maximum(0.1, 1 / (1 + hours_ago * 0.1))
+        scores = np.fromiter((item.get('sentiment_score', 0) for item in analyzed_news),
+                             dtype=np.float64, count=len(analyzed_news))
+        
+        overall_sentiment = float((scores * time_weights).mean())
         sentiment_label = self.get_sentiment_label(overall_sentiment)
         
         return round(overall_sentiment, 3), sentiment_label
     
     def update_sentiment_history(self, sentiment_score):
         """Update sentiment history for tracking"""
-        now = datetime.now(timezone("Asia/Kolkata"))
+        now = datetime.now(IST)
         
-        # Add current sentiment to history
-        st.session_state.sentiment_history.append({
-            'timestamp': now,
-            'sentiment_score': sentiment_score,
-            'time_str': now.strftime("%H:%M")
-        })
+        history = st.session_state.sentiment_history
+        
+        # Add current sentiment to history (ring buffer evicts the oldest entry)
+        history.append((now, sentiment_score))
         
         # Keep only last 24 hours of data
         cutoff_time = now - timedelta(hours=24)
-        st.session_state.sentiment_history = [
-            item for item in st.session_state.sentiment_history
-            if item['timestamp'] > cutoff_time
-        ]
+        while history and history[0][0] <= cutoff_time:
+            history.popleft()
     
     def render_sentiment_analysis_ui(self):
         """Render sentiment analysis interface"""
@@ -360,7 +547,7 @@ class MarketSentimentAnalyzer:
         # Auto refresh every 15 minutes
         if auto_refresh:
             if (not st.session_state.last_news_fetch or 
-                (datetime.now(timezone("Asia/Kolkata")) - st.session_state.last_news_fetch).total_seconds() > 900):
+                (datetime.now(IST) - st.session_state.last_news_fetch).total_seconds() > 900):
                 self.fetch_and_analyze_news()
         
         # Display sentiment dashboard
@@ -386,7 +573,7 @@ class MarketSentimentAnalyzer:
                 overall_score, overall_label = self.calculate_overall_sentiment(analyzed_news)
                 
                 # Update session state
-                st.session_state.news_data = analyzed_news
+                st.session_state.news_df = build_news_df(analyzed_news)
                 st.session_state.current_sentiment_score = overall_score
                 
                 # Update history
@@ -401,7 +588,8 @@ class MarketSentimentAnalyzer:
     
     def render_sentiment_dashboard(self):
         """Render sentiment dashboard with key metrics"""
-        if not st.session_state.news_data:
+        news_df = st.session_state.news_df
+        if news_df.empty:
             st.info("📰 Click 'Refresh News' to fetch latest market sentiment")
             return
         
@@ -409,6 +597,10 @@ class MarketSentimentAnalyzer:
         overall_score = st.session_state.current_sentiment_score
         overall_label = self.get_sentiment_label(overall_score)
         
+        scores = news_df['sentiment_score']
+        positive_news = int((scores > 0.1).sum())
+        negative_news = int((scores < -0.1).sum())
+        
         # Create metrics dashboard
         col1, col2, col3, col4 = st.columns(4)
         
@@ -425,11 +617,9 @@ class MarketSentimentAnalyzer:
             st.metric("🎯 Market Mood", overall_label.split()[1])
         
         with col3:
-            positive_news = len([n for n in st.session_state.news_data if n.get('sentiment_score', 0) > 0.1])
             st.metric("🟢 Positive News", positive_news)
         
         with col4:
-            negative_news = len([n for n in st.session_state.news_data if n.get('sentiment_score', 0) < -0.1])
             st.metric("🔴 Negative News", negative_news)
         
         # Sentiment gauge
@@ -440,77 +630,43 @@ class MarketSentimentAnalyzer:
     
     def render_sentiment_gauge(self, sentiment_score):
         """Render sentiment gauge chart"""
-        fig = go.Figure(go.Indicator(
-            mode = "gauge+number+delta",
-            value = sentiment_score,
-            domain = {'x': [0, 1], 'y': [0, 1]},
-            title = {'text': "Market Sentiment Score"},
-            delta = {'reference': 0},
-            gauge = {
-                'axis': {'range': [-1, 1]},
-                'bar': {'color': "darkblue"},
-                'steps': [
-                    {'range': [-1, -0.3], 'color': "lightcoral"},
-                    {'range': [-0.3, 0.3], 'color': "lightyellow"},
-                    {'range': [0.3, 1], 'color': "lightgreen"}
-                ],
-                'threshold': {
-                    'line': {'color': "red", 'width': 4},
-                    'thickness': 0.75,
-                    'value': 0
-                }
-            }
-        ))
-        
-        fig.update_layout(
-            height=300,
-            title="Current Market Sentiment",
-            template="plotly_white"
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(build_sentiment_gauge(round(sentiment_score, 2)), use_container_width=True)
     
     def render_top_headlines(self):
         """Render top 3 headlines with sentiment"""
         st.markdown("### 📋 Top Headlines")
         
         # Sort news by absolute sentiment score (most impactful)
-        sorted_news = sorted(
-            st.session_state.news_data,
-            key=lambda x: abs(x.get('sentiment_score', 0)),
-            reverse=True
-        )
-        
-        for i, news in enumerate(sorted_news[:3], 1):
-            sentiment_score = news.get('sentiment_score', 0)
-            sentiment_label = news.get('sentiment_label', '🟡 Neutral')
-            
+        news_df = st.session_state.news_df
+        top_index = news_df['sentiment_score'].abs().sort_values(ascending=False, kind='stable').index[:3]
+        
+        for i, news in enumerate(news_df.loc[top_index].itertuples(index=False), 1):
             # Create expandable headline
-            with st.expander(f"#{i} {news.get('title', 'No title')}", expanded=i==1):
+            with st.expander(f"#{i} {news.title}", expanded=i==1):
                 col1, col2 = st.columns([3, 1])
                 
                 with col1:
-                    st.write(f"**Source:** {news.get('source', 'Unknown')}")
-                    if 'summary' in news:
-                        st.write(f"**Summary:** {news['summary'][:200]}...")
+                    st.write(f"**Source:** {news.source}")
+                    if news.summary:
+                        st.write(f"**Summary:** {news.summary[:200]}...")
                     
-                    timestamp = news.get('timestamp', datetime.now())
-                    if isinstance(timestamp, datetime):
-                        time_str = timestamp.strftime("%H:%M, %d %b")
+                    if isinstance(news.timestamp, datetime) and pd.notna(news.timestamp):
+                        time_str = news.timestamp.strftime("%H:%M, %d %b")
                     else:
-                        time_str = str(timestamp)
+                        time_str = str(news.timestamp)
                     st.caption(f"Time: {time_str}")
                 
                 with col2:
-                    st.metric("Sentiment", f"{sentiment_score:+.2f}")
-                    st.write(sentiment_label)
+                    st.metric("Sentiment", f"{news.sentiment_score:+.2f}")
+                    st.write(news.sentiment_label)
                     
-                    if 'url' in news:
-                        st.link_button("🔗 Read More", news['url'])
+                    if pd.notna(news.url):
+                        st.link_button("🔗 Read More", news.url)
     
     def render_news_feed(self):
         """Render complete news feed"""
-        if not st.session_state.news_data:
+        news_df = st.session_state.news_df
+        if news_df.empty:
             return
         
         st.markdown("### 📰 Complete News Feed")
@@ -531,34 +687,37 @@ class MarketSentimentAnalyzer:
             )
         
         # Apply filters
-        filtered_news = st.session_state.news_data.copy()
-        
-        if sentiment_filter != "All":
-            if sentiment_filter == "Positive":
-                filtered_news = [n for n in filtered_news if n.get('sentiment_score', 0) > 0.1]
-            elif sentiment_filter == "Negative":
-                filtered_news = [n for n in filtered_news if n.get('sentiment_score', 0) < -0.1]
-            elif sentiment_filter == "Neutral":
-                filtered_news = [n for n in filtered_news if -0.1 <= n.get('sentiment_score', 0) <= 0.1]
+        scores = news_df['sentiment_score']
+        if sentiment_filter == "Positive":
+            filtered_df = news_df[scores > 0.1]
+        elif sentiment_filter == "Negative":
+            filtered_df = news_df[scores < -0.1]
+        elif sentiment_filter == "Neutral":
+            filtered_df = news_df[scores.between(-0.1, 0.1)]
+        else:
+            filtered_df = news_df
         
-        # Apply sorting
+        # Apply sorting (stable, so ties keep fetch order)
         if sort_by == "Sentiment Impact":
-            filtered_news.sort(key=lambda x: abs(x.get('sentiment_score', 0)), reverse=True)
+            filtered_df = filtered_df.loc[filtered_df['sentiment_score'].abs().sort_values(ascending=False, kind='stable').index]
         elif sort_by == "Time":
-            filtered_news.sort(key=lambda x: x.get('timestamp', datetime.now()), reverse=True)
+            filtered_df = filtered_df.sort_values('timestamp', ascending=False, kind='stable', na_position='first')
         elif sort_by == "Source":
-            filtered_news.sort(key=lambda x: x.get('source', ''))
+            filtered_df = filtered_df.sort_values('source', kind='stable')
         
         # Display filtered news
-        if filtered_news:
+        if not filtered_df.empty:
             # Create DataFrame for better display
-            news_df = pd.DataFrame([{
-                'Title': item.get('title', 'No title')[:80] + '...' if len(item.get('title', '')) > 80 else item.get('title', 'No title'),
-                'Source': item.get('source', 'Unknown'),
-                'Sentiment': f"{item.get('sentiment_score', 0):+.2f}",
-                'Label': item.get('sentiment_label', '🟡 Neutral'),
-                'Time': item.get('timestamp', datetime.now()).strftime('%H:%M') if isinstance(item.get('timestamp'), datetime) else str(item.get('timestamp', ''))
-            } for item in filtered_news])
+            titles = filtered_df['title']
+            timestamps = filtered_df['timestamp'].fillna('')
+            
+            display_df = pd.DataFrame({
+                'Title': titles.str.slice(0, 80) + np.where(titles.str.len() > 80, '...', ''),
+                'Source': filtered_df['source'],
+                'Sentiment': filtered_df['sentiment_score'].map('{:+.2f}'.format),
+                'Label': filtered_df['sentiment_label'],
+                'Time': pd.to_datetime(timestamps, errors='coerce').dt.strftime('%H:%M').fillna(timestamps.astype(str))
+            })
             
             # Style the dataframe
             def highlight_sentiment(row):
@@ -576,7 +735,7 @@ class MarketSentimentAnalyzer:
                         colors.append('')
                 return colors
             
-            styled_df = news_df.style.apply(highlight_sentiment, axis=1)
+            styled_df = display_df.style.apply(highlight_sentiment, axis=1)
             st.dataframe(styled_df, use_container_width=True, height=400)
         else:
             st.info("No news items match the selected filters")
@@ -589,74 +748,38 @@ class MarketSentimentAnalyzer:
         st.markdown("### 📈 Sentiment Trends")
         
         # Create DataFrame from history
-        history_df = pd.DataFrame(st.session_state.sentiment_history)
+        history_df = pd.DataFrame(list(st.session_state.sentiment_history),
+                                  columns=['timestamp', 'sentiment_score'])
+        scores = history_df['sentiment_score'].to_numpy(dtype=np.float64)
         
         if len(history_df) < 2:
             st.info("Need more data points to show trends")
             return
         
-        # Create time series chart
-        fig = go.Figure()
-        
-        # Add sentiment line
-        fig.add_trace(go.Scatter(
-            x=history_df['timestamp'],
-            y=history_df['sentiment_score'],
-            mode='lines+markers',
-            name='Sentiment Score',
-            line=dict(color='blue', width=2),
-            marker=dict(size=6)
-        ))
-        
-        # Add sentiment zones
-        fig.add_hline(y=0.3, line_dash="dash", line_color="green", 
-                     annotation_text="Positive Zone", annotation_position="right")
-        fig.add_hline(y=-0.3, line_dash="dash", line_color="red", 
-                     annotation_text="Negative Zone", annotation_position="right")
-        fig.add_hline(y=0, line_dash="dot", line_color="gray", 
-                     annotation_text="Neutral", annotation_position="right")
-        
-        # Fill sentiment zones
-        fig.add_shape(type="rect", xref="paper", yref="y",
-                     x0=0, x1=1, y0=0.3, y1=1,
-                     fillcolor="rgba(0,255,0,0.1)", line=dict(width=0))
-        fig.add_shape(type="rect", xref="paper", yref="y",
-                     x0=0, x1=1, y0=-1, y1=-0.3,
-                     fillcolor="rgba(255,0,0,0.1)", line=dict(width=0))
-        
-        fig.update_layout(
-            title="Market Sentiment Over Time",
-            xaxis_title="Time",
-            yaxis_title="Sentiment Score",
-            template="plotly_white",
-            height=400,
-            yaxis=dict(range=[-1, 1])
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(build_sentiment_trends_figure(history_df), use_container_width=True)
         
         # Sentiment statistics
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            avg_sentiment = history_df['sentiment_score'].mean()
+            avg_sentiment = scores.mean()
             st.metric("📊 Avg Sentiment", f"{avg_sentiment:+.2f}")
         
         with col2:
-            max_sentiment = history_df['sentiment_score'].max()
+            max_sentiment = scores.max()
             st.metric("📈 Peak Positive", f"{max_sentiment:+.2f}")
         
         with col3:
-            min_sentiment = history_df['sentiment_score'].min()
+            min_sentiment = scores.min()
             st.metric("📉 Peak Negative", f"{min_sentiment:+.2f}")
         
         with col4:
-            sentiment_volatility = history_df['sentiment_score'].std()
+            sentiment_volatility = scores.std(ddof=1)
             st.metric("🔀 Volatility", f"{sentiment_volatility:.2f}")
     
     def get_trading_signal_from_sentiment(self):
         """Generate trading signals based on sentiment analysis"""
-        if not st.session_state.news_data:
+        if st.session_state.news_df.empty:
             return None
         
         current_sentiment = st.session_state.current_sentiment_score
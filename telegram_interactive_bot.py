@@ -1,23 +1,203 @@
+import atexit
+import html
+import os
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+import pandas as pd
+
+# orjson is an optional speedup for the Bot API JSON paths; stdlib json is the fallback
+try:
+    import orjson
+    json_dumps = lambda obj: orjson.dumps(obj).decode()
+    json_loads = orjson.loads
+except ImportError:
+    json_dumps = json.dumps
+    json_loads = json.loads
 from datetime import datetime
 from pytz import timezone
 import time
 import threading
+import uuid
+import queue
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from ui_components import append_to_log
+
+# Bot API root; point TG_API_BASE at a self-hosted telegram-bot-api server to skip the cloud round trip
+TG_BASE = os.environ.get("TG_API_BASE", "https://api.telegram.org").rstrip("/")
+
+# Shared keep-alive session so bot calls reuse one TCP+TLS connection to the Bot API
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(
+    pool_connections=4, pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+)
+_SESSION.mount("https://", _ADAPTER)
+_SESSION.mount("http://", _ADAPTER)
+atexit.register(_SESSION.close)
+
+IST = timezone("Asia/Kolkata")
+
+# Trade confirmation keyboard serialized once; the placeholder is swapped for the trade id
+TRADE_ID_PLACEHOLDER = "__TRADE_ID__"
+CONFIRMATION_KEYBOARD_JSON = json.dumps({
+    "inline_keyboard": [
+        [
+            {"text": "✅ Confirm & Log", "callback_data": f"confirm_{TRADE_ID_PLACEHOLDER}"},
+            {"text": "❌ Skip Trade", "callback_data": f"skip_{TRADE_ID_PLACEHOLDER}"}
+        ],
+        [
+            {"text": "📝 Modify Trade", "callback_data": f"modify_{TRADE_ID_PLACEHOLDER}"}
+        ]
+    ]
+})
+
+# Columnar trade tables indexed by trade_id; extra signal fields are kept as object columns
+TRADE_STATUS_DTYPE = pd.CategoricalDtype(['pending', 'confirmed', 'skipped'])
+TRADE_DTYPES = {
+    'Type': 'category',
+    'Strike': 'Int32',
+    'LTP': 'float32',
+    'Target': 'float32',
+    'SL': 'float32',
+    'status': TRADE_STATUS_DTYPE,
+    'timestamp': 'datetime64[ns, Asia/Kolkata]'
+}
+
+def retry_after_seconds(response, default=1):
+    """Wait time Telegram asks for in a 429 response"""
+    try:
+        return int(json_loads(response.content)["parameters"]["retry_after"])
+    except (ValueError, KeyError, TypeError):
+        return default
+
+def empty_trade_frame():
+    """Empty trade table with the typed columns"""
+    return pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in TRADE_DTYPES.items()},
+                        index=pd.Index([], name='trade_id', dtype=object))
+
+def concat_trades(trades, rows):
+    """Append trade rows, keeping the typed columns (categories are re-derived)"""
+    combined = pd.concat([trades, rows])
+    return combined.astype({col: dtype for col, dtype in TRADE_DTYPES.items() if col in combined})
+
+def trade_log_entry(trade):
+    """Plain-Python trade record for the session trade log"""
+    entry = trade.dropna().to_dict()
+    for col in ('LTP', 'Target', 'SL'):
+        if col in entry:
+            entry[col] = round(float(entry[col]), 2)  # Undo float32 representation noise
+    if 'Strike' in entry:
+        entry['Strike'] = int(entry['Strike'])
+    entry['timestamp'] = trade['timestamp'].isoformat()
+    return entry
+
+def trade_frame(trade_id, record):
+    """One-row typed trade table for a trade signal"""
+    df = pd.DataFrame([record], index=pd.Index([trade_id], name='trade_id', dtype=object))
+    for col in ('Strike', 'LTP', 'Target', 'SL'):
+        if col in df:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df.astype({col: dtype for col, dtype in TRADE_DTYPES.items() if col in df})
+
+def _H(value):
+    """Escape a field for interpolation into an HTML-mode message"""
+    return html.escape(str(value), quote=False)
+
+# Message templates built once; only the per-trade fields are substituted
+TRADE_SIGNAL_TMPL = "\n".join((
+    "🚨 <b>TRADE SIGNAL DETECTED</b> 🚨",
+    "",
+    "📍 <b>Type:</b> {type}",
+    "🎯 <b>Strike:</b> {strike}",
+    "💰 <b>Entry Price:</b> ₹{ltp}",
+    "🎯 <b>Target:</b> ₹{target}",
+    "🛑 <b>Stop Loss:</b> ₹{sl}",
+    "",
+    "⏰ <b>Time:</b> {time}",
+    "",
+    "<b>Do you want to log this trade?</b>"
+))
+
+TRADE_CONFIRMED_TMPL = "\n".join((
+    "✅ <b>TRADE CONFIRMED & LOGGED</b>",
+    "",
+    "📝 <b>Trade Details:</b>",
+    "🎯 {type} {strike} @ ₹{ltp}",
+    "📊 Target: ₹{target} | SL: ₹{sl}",
+    "",
+    "🕐 <b>Logged at:</b> {time}",
+    "",
+    "Good luck with your trade! 🚀"
+))
+
+TRADE_SKIPPED_MSG = "\n".join((
+    "❌ <b>TRADE SKIPPED</b>",
+    "",
+    "The trade signal has been ignored as requested."
+))
+
+TRADE_MODIFY_TMPL = "\n".join((
+    "📝 <b>TRADE MODIFICATION</b>",
+    "",
+    "To modify this trade, please send a message in this format:",
+    "",
+    "<code>/modify {trade_id} [field] [new_value]</code>",
+    "",
+    "Available fields:",
+    "• <b>target</b> - Change target price",
+    "• <b>sl</b> - Change stop loss",
+    "• <b>entry</b> - Change entry price",
+    "",
+    "Example: <code>/modify {trade_id} target 150</code>"
+))
+
+@st.cache_resource(show_spinner=False)
+def _bot_state():
+    """Process-wide bot state kept out of st.session_state (never hashed or diffed on reruns)"""
+    return {
+        "pending": empty_trade_frame(),
+        "confirmed": empty_trade_frame(),
+        "last_update_id": 0,
+        # Telegram allows one getUpdates consumer per token, so polling is process-wide too;
+        # callbacks are routed to a queue per originating session so only that session logs them
+        "owners": {},
+        "callbacks": {},
+        "stop_event": threading.Event(),
+        "poll_thread": None,
+        # Every session's script thread shares the pending/confirmed frames
+        "lock": threading.RLock()
+    }
+
+LONG_POLL_TIMEOUT = 30  # Seconds Telegram holds getUpdates open waiting for new updates
+ALLOWED_UPDATES_JSON = json.dumps(["callback_query", "message"])
+
+def _session_id():
+    """Id of the Streamlit session running the current script (a fixed key outside a session)"""
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else "local"
 
 class TelegramInteractiveBot:
     def __init__(self):
         self.initialize_session_state()
+        self.state = _bot_state()
+        self.session_id = _session_id()
         self.bot_token, self.chat_id = self.get_telegram_credentials()
-        self.last_update_id = 0
+        self._callback_handlers = {
+            "confirm": self.confirm_trade,
+            "skip": self.skip_trade,
+            "modify": self.modify_trade
+        }
+        if st.session_state.bot_active:
+            self.start_polling()
+        
+        # The bot is built on every rerun, so this is where queued button presses get handled
+        self.process_pending_callbacks()
     
     def initialize_session_state(self):
         """Initialize bot session state"""
-        if 'pending_trades' not in st.session_state:
-            st.session_state.pending_trades = {}
-        if 'confirmed_trades' not in st.session_state:
-            st.session_state.confirmed_trades = []
         if 'bot_active' not in st.session_state:
             st.session_state.bot_active = False
         if 'manual_trades' not in st.session_state:
@@ -38,7 +218,7 @@ class TelegramInteractiveBot:
         if not self.bot_token or not self.chat_id:
             return False
         
-        url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
+        url = f"{TG_BASE}/bot{self.bot_token}/sendMessage"
         data = {
             "chat_id": self.chat_id,
             "text": message,
@@ -46,52 +226,53 @@ class TelegramInteractiveBot:
         }
         
         if reply_markup:
-            data["reply_markup"] = json.dumps(reply_markup)
+            # Accept pre-serialized JSON to skip re-encoding fixed keyboards
+            data["reply_markup"] = reply_markup if isinstance(reply_markup, str) else json_dumps(reply_markup)
         
         try:
-            response = requests.post(url, data=data, timeout=10)
-            return response.status_code == 200
-        except:
+            response = _SESSION.post(url, data=data, timeout=10)
+        except requests.exceptions.RequestException:
+            return False
+        
+        if response.status_code == 429:
+            # Rate limited: resend once Telegram's retry_after window has passed
+            retry = threading.Timer(retry_after_seconds(response), self.send_message, args=(message, reply_markup))
+            retry.daemon = True
+            retry.start()
             return False
+        
+        return response.status_code == 200
     
     def send_trade_confirmation_request(self, trade_data):
         """Send trade signal with confirmation buttons"""
-        trade_id = f"trade_{int(time.time())}"
+        # Unique even for signals in the same second; a repeated index label would break .at/.loc lookups
+        trade_id = f"trade_{uuid.uuid4().hex}"
+        now = datetime.now(IST)
         
         # Store pending trade
-        st.session_state.pending_trades[trade_id] = {
-            **trade_data,
-            'timestamp': datetime.now(timezone("Asia/Kolkata")).isoformat(),
-            'status': 'pending'
-        }
+        with self.state["lock"]:
+            self.state["pending"] = concat_trades(
+                self.state["pending"],
+                trade_frame(trade_id, {
+                    **trade_data,
+                    'timestamp': now,
+                    'status': 'pending'
+                })
+            )
+            self.state["owners"][trade_id] = self.session_id
         
         # Create message
-        message = f"""
-🚨 <b>TRADE SIGNAL DETECTED</b> 🚨
-
-📍 <b>Type:</b> {trade_data.get('Type', 'N/A')} 
-🎯 <b>Strike:</b> {trade_data.get('Strike', 'N/A')}
-💰 <b>Entry Price:</b> ₹{trade_data.get('LTP', 'N/A')}
-🎯 <b>Target:</b> ₹{trade_data.get('Target', 'N/A')}
-🛑 <b>Stop Loss:</b> ₹{trade_data.get('SL', 'N/A')}
-
-⏰ <b>Time:</b> {datetime.now(timezone('Asia/Kolkata')).strftime('%H:%M:%S')}
-
-<b>Do you want to log this trade?</b>
-        """
-        
-        # Create inline keyboard
-        keyboard = {
-            "inline_keyboard": [
-                [
-                    {"text": "✅ Confirm & Log", "callback_data": f"confirm_{trade_id}"},
-                    {"text": "❌ Skip Trade", "callback_data": f"skip_{trade_id}"}
-                ],
-                [
-                    {"text": "📝 Modify Trade", "callback_data": f"modify_{trade_id}"}
-                ]
-            ]
-        }
+        message = TRADE_SIGNAL_TMPL.format(
+            type=_H(trade_data.get('Type', 'N/A')),
+            strike=_H(trade_data.get('Strike', 'N/A')),
+            ltp=_H(trade_data.get('LTP', 'N/A')),
+            target=_H(trade_data.get('Target', 'N/A')),
+            sl=_H(trade_data.get('SL', 'N/A')),
+            time=now.strftime('%H:%M:%S')
+        )
+        
+        # Inline keyboard (pre-serialized; only the trade id varies)
+        keyboard = CONFIRMATION_KEYBOARD_JSON.replace(TRADE_ID_PLACEHOLDER, trade_id)
         
         success = self.send_message(message, keyboard)
         
@@ -102,111 +283,202 @@ class TelegramInteractiveBot:
         
         return trade_id
     
-    def get_updates(self):
-        """Get updates from Telegram bot"""
+    def get_updates(self, max_retries=3):
+        """Get updates from Telegram bot (long polling)"""
         if not self.bot_token:
             return []
         
-        url = f"https://api.telegram.org/bot{self.bot_token}/getUpdates"
+        url = f"{TG_BASE}/bot{self.bot_token}/getUpdates"
         params = {
-            "offset": self.last_update_id + 1,
-            "timeout": 1
+            "offset": self.state["last_update_id"] + 1,
+            "timeout": LONG_POLL_TIMEOUT,  # Server holds the request until updates arrive
+            "limit": 100,
+            "allowed_updates": ALLOWED_UPDATES_JSON  # Only what the bot handles; smaller payloads
         }
         
-        try:
-            response = requests.get(url, params=params, timeout=5)
-            if response.status_code == 200:
-                data = response.json()
-                return data.get("result", [])
-        except:
-            pass
+        for attempt in range(max_retries):
+            try:
+                response = _SESSION.get(url, params=params, timeout=LONG_POLL_TIMEOUT + 5)
+                if response.status_code == 200:
+                    updates = json_loads(response.content).get("result", [])
+                    if updates:
+                        # Acknowledge everything received so the server drops it from its buffer
+                        # (update_ids are issued in increasing order, so the last one is the max)
+                        self.state["last_update_id"] = updates[-1]["update_id"]
+                    return updates
+                if response.status_code == 429:
+                    time.sleep(retry_after_seconds(response))
+                    continue
+                return []
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                time.sleep(2 ** attempt)  # Dropped long-poll connection, back off and retry
+            except (requests.exceptions.RequestException, ValueError):
+                return []
         
         return []
     
+    def start_polling(self):
+        """Start the process-wide long-polling thread (Telegram allows one getUpdates consumer per token)"""
+        if not self.bot_token:
+            return
+        
+        with self.state["lock"]:
+            # A thread that is still finishing its last getUpdates after a stop just keeps going,
+            # so a quick stop/start never runs two consumers (Telegram answers 409 Conflict)
+            self.state["stop_event"].clear()
+            if self.state["poll_thread"] is not None:
+                return
+            
+            thread = threading.Thread(
+                target=self._poll_loop,
+                args=(self.state["stop_event"],),
+                daemon=True
+            )
+            self.state["poll_thread"] = thread
+            thread.start()
+    
+    def stop_polling(self):
+        """Ask the polling thread to exit after its in-flight getUpdates; returns immediately"""
+        self.state["stop_event"].set()
+    
+    def session_pending(self):
+        """Pending trades sent from this session"""
+        with self.state["lock"]:
+            pending = self.state["pending"]
+            return pending.loc[pending.index.map(self.state["owners"].get) == self.session_id]
+    
+    def is_polling(self):
+        """Whether the polling thread is running and not asked to stop"""
+        return self.state["poll_thread"] is not None and not self.state["stop_event"].is_set()
+    
+    def _poll_loop(self, stop_event):
+        """Long-poll Telegram and queue callback queries for their sessions (runs off the script thread)"""
+        while True:
+            # Exit decision and handle release happen under the lock start_polling takes
+            with self.state["lock"]:
+                if stop_event.is_set():
+                    self.state["poll_thread"] = None
+                    return
+            
+            updates = self.get_updates()
+            for update in updates:
+                if "callback_query" in update:
+                    self._route_callback(update["callback_query"])
+            
+            if not updates:
+                stop_event.wait(1)  # Avoid a tight loop when the API errors out immediately
+    
+    def _route_callback(self, callback_query):
+        """Queue a callback for the session that sent its trade; presses for unknown trades are dropped"""
+        trade_id = callback_query.get("data", "").partition("_")[2]
+        with self.state["lock"]:
+            owner = self.state["owners"].get(trade_id)
+            if owner is not None:
+                self.state["callbacks"].setdefault(owner, queue.Queue()).put(callback_query)
+    
+    def process_pending_callbacks(self):
+        """Handle this session's callback queries queued by the polling thread since the last rerun"""
+        with self.state["lock"]:
+            callback_queue = self.state["callbacks"].get(self.session_id)
+        if callback_queue is None:
+            return
+        while True:
+            try:
+                callback_query = callback_queue.get_nowait()
+            except queue.Empty:
+                break
+            self.process_callback_query(callback_query)
+    
     def process_callback_query(self, callback_query):
         """Process callback query from inline keyboard"""
-        callback_data = callback_query.get("callback_data", "")
+        callback_data = callback_query.get("data", "")  # Bot API field carrying the button's callback_data
         message_id = callback_query.get("message", {}).get("message_id")
         
-        if callback_data.startswith("confirm_"):
-            trade_id = callback_data.replace("confirm_", "")
-            self.confirm_trade(trade_id, message_id)
-        
-        elif callback_data.startswith("skip_"):
-            trade_id = callback_data.replace("skip_", "")
-            self.skip_trade(trade_id, message_id)
-        
-        elif callback_data.startswith("modify_"):
-            trade_id = callback_data.replace("modify_", "")
-            self.modify_trade(trade_id, message_id)
+        # "<action>_<trade_id>" -> one split and an O(1) handler lookup
+        action, _, trade_id = callback_data.partition("_")
+        handler = self._callback_handlers.get(action)
+        if handler:
+            handler(trade_id, message_id)
     
     def confirm_trade(self, trade_id, message_id):
         """Confirm and log the trade"""
-        if trade_id in st.session_state.pending_trades:
-            trade = st.session_state.pending_trades[trade_id]
-            trade['status'] = 'confirmed'
+        with self.state["lock"]:
+            pending = self.state["pending"]
+            if trade_id not in pending.index:
+                return
+            
+            pending.at[trade_id, 'status'] = 'confirmed'
+            trade = pending.loc[trade_id]
             
             # Add to confirmed trades
-            st.session_state.confirmed_trades.append(trade)
+            self.state["confirmed"] = concat_trades(self.state["confirmed"], pending.loc[[trade_id]])
             
             # Add to main trade log
-            st.session_state.trade_log.append(trade)
+            log_entry = trade_log_entry(trade)
+            append_to_log('trade_log', log_entry)
             
             # Remove from pending
-            del st.session_state.pending_trades[trade_id]
-            
-            # Send confirmation message
-            confirmation_msg = f"""
-✅ <b>TRADE CONFIRMED & LOGGED</b>
-
-📝 <b>Trade Details:</b>
-🎯 {trade.get('Type')} {trade.get('Strike')} @ ₹{trade.get('LTP')}
-📊 Target: ₹{trade.get('Target')} | SL: ₹{trade.get('SL')}
-
-🕐 <b>Logged at:</b> {datetime.now(timezone('Asia/Kolkata')).strftime('%H:%M:%S')}
-
-Good luck with your trade! 🚀
-            """
-            
-            self.send_message(confirmation_msg)
-            
-            # Edit original message
-            self.edit_message(message_id, "✅ Trade Confirmed and Logged")
+            pending.drop(trade_id, inplace=True)
+            self.state["owners"].pop(trade_id, None)
+        
+        # Send confirmation message
+        confirmation_msg = TRADE_CONFIRMED_TMPL.format(
+            type=_H(log_entry.get('Type')),
+            strike=_H(log_entry.get('Strike')),
+            ltp=_H(log_entry.get('LTP')),
+            target=_H(log_entry.get('Target')),
+            sl=_H(log_entry.get('SL')),
+            time=datetime.now(IST).strftime('%H:%M:%S')
+        )
+        
+        self.send_message(confirmation_msg)
+        
+        # Edit original message
+        self.edit_message(message_id, "✅ Trade Confirmed and Logged")
     
     def skip_trade(self, trade_id, message_id):
         """Skip the trade"""
-        if trade_id in st.session_state.pending_trades:
-            trade = st.session_state.pending_trades[trade_id]
-            trade['status'] = 'skipped'
+        with self.state["lock"]:
+            pending = self.state["pending"]
+            if trade_id not in pending.index:
+                return
             
             # Remove from pending
-            del st.session_state.pending_trades[trade_id]
-            
-            # Send skip message
-            skip_msg = f"""
-❌ <b>TRADE SKIPPED</b>
-
-The trade signal has been ignored as requested.
-            """
-            
-            self.send_message(skip_msg)
-            
-            # Edit original message
-            self.edit_message(message_id, "❌ Trade Skipped")
+            pending.drop(trade_id, inplace=True)
+            self.state["owners"].pop(trade_id, None)
+        
+        # Send skip message
+        skip_msg = TRADE_SKIPPED_MSG
+        
+        self.send_message(skip_msg)
+        
+        # Edit original message
+        self.edit_message(message_id, "❌ Trade Skipped")
     
     def modify_trade(self, trade_id, message_id):
         """Handle trade modification request"""
-        if trade_id in st.session_state.pending_trades:
-            modify_msg = f"""
-📝 <b>TRADE MODIFICATION</b>
-
-To modify this trade, please send a message in this format:
-
-<code>/modify {trade_id} [field] [new_value]</code>
-
-Available fields:
-• <b>target</b> - Change target price
-• <b>sl</b> - Change stop loss
-• <b>entry</b> - Change entry price
-
-Example: <code>/modify {trade_id} target
\ No newline at end of file
+        with self.state["lock"]:
+            is_pending = trade_id in self.state["pending"].index
+        if is_pending:
+            modify_msg = TRADE_MODIFY_TMPL.format(trade_id=trade_id)
+            
+            self.send_message(modify_msg)
+    
+    def edit_message(self, message_id, text):
+        """Replace the text (and inline keyboard) of a sent message"""
+        if not self.bot_token or not self.chat_id or not message_id:
+            return False
+        
+        url = f"{TG_BASE}/bot{self.bot_token}/editMessageText"
+        data = {
+            "chat_id": self.chat_id,
+            "message_id": message_id,
+            "text": text,
+            "parse_mode": "HTML"
+        }
+        
+        try:
+            response = _SESSION.post(url, data=data, timeout=10)
+            return response.status_code == 200
+        except requests.exceptions.RequestException:
+            return False
@@ -1,12 +1,93 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import streamlit as st
+from datetime import datetime
+from pytz import timezone
+
+IST = timezone("Asia/Kolkata")
+
+logger = logging.getLogger(__name__)
+
+# Send failures raised on worker threads, which have no Streamlit context; shown on the next rerun
+_send_errors = queue.SimpleQueue()
+
+# Bot API root; TG_API_BASE can point at a local telegram-bot-api server
+TG_BASE = os.environ.get("TG_API_BASE", "https://api.telegram.org").rstrip("/")
+
+# Shared keep-alive session so repeated alerts reuse one TCP+TLS connection
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(
+    pool_connections=4, pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+)
+_SESSION.mount("https://", _ADAPTER)
+_SESSION.mount("http://", _ADAPTER)
+atexit.register(_SESSION.close)
+
+# Single background sender: owns alert batching, rate limiting and 429 retries, so sends never block the rerun
+_EXEC = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tg")
+atexit.register(_EXEC.shutdown)
+
+class _TokenBucket:
+    """Thread-safe token bucket limiting sends to Telegram's bot-wide rate"""
+    
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until a token is available, then take it"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+_limiter = _TokenBucket(rate=30, capacity=30)  # 30 msg/s bot-wide cap
+
+SEND_ATTEMPTS = 3  # Tries per message when Telegram answers 429
+
+# Alerts raised in the same tick are coalesced into as few sendMessage calls as possible
+ALERT_SEPARATOR = "\n\n──\n\n"
+ALERT_BATCH_CHARS = 3500  # Headroom under Telegram's 4096-char message limit
+ALERT_FLUSH_DELAY = 0.25  # Seconds to wait for more alerts before sending
+
+_pending_msgs = []  # (creds, message, silent, future) awaiting the next drain
+_pending_lock = threading.Lock()
+_drain_scheduled = False
+_batch_full = threading.Event()  # Wakes a waiting drain early once a batch is full
+
+@st.cache_resource(show_spinner=False)
+def _get_creds():
+    """Read Telegram credentials from Streamlit secrets once per process"""
+    return st.secrets["telegram"]["bot_token"], st.secrets["telegram"]["chat_id"]
+
+@lru_cache(maxsize=8)
+def _api_url(bot_token, method):
+    """Bot API endpoint URL for a token/method pair"""
+    return f"{TG_BASE}/bot{bot_token}/{method}"
 
 def get_telegram_credentials():
     """Get Telegram credentials from Streamlit secrets"""
     try:
-        bot_token = st.secrets["telegram"]["bot_token"]
-        chat_id = st.secrets["telegram"]["chat_id"]
-        return bot_token, chat_id
+        return _get_creds()
     except KeyError as e:
         st.error(f"❌ Telegram credentials not found in secrets: {e}")
         return None, None
@@ -14,43 +95,161 @@ def get_telegram_credentials():
         st.error(f"❌ Error accessing Telegram secrets: {e}")
         return None, None
 
-def send_telegram_message(message):
-    """Send message to Telegram"""
+def _report(level, text):
+    """Log a send failure and queue it for display on the script thread"""
+    logger.log(level, text)
+    _send_errors.put((level, text))
+
+def show_telegram_errors():
+    """Show send failures reported by background sends since the last rerun"""
+    while True:
+        try:
+            level, text = _send_errors.get_nowait()
+        except queue.Empty:
+            return
+        if level >= logging.ERROR:
+            st.error(f"❌ {text}")
+        else:
+            st.warning(f"⚠️ {text}")
+
+def _post_message(bot_token, chat_id, message, silent=False):
+    """POST one message to the Bot API and return the response"""
+    _limiter.acquire()
+    data = {
+        "chat_id": chat_id,
+        "text": message,
+        "disable_notification": silent,
+        "disable_web_page_preview": True
+    }
+    return _SESSION.post(_api_url(bot_token, "sendMessage"), data=data, timeout=10)
+
+def _retry_after(response, default=1):
+    """Wait time Telegram asks for in a 429 response"""
+    try:
+        return int(response.json()["parameters"]["retry_after"])
+    except (ValueError, KeyError, TypeError):
+        return default
+
+def _report_send_error(error):
+    """Report a failed send from any thread"""
+    if isinstance(error, requests.exceptions.Timeout):
+        _report(logging.WARNING, "Telegram message timeout")
+    elif isinstance(error, requests.exceptions.ConnectionError):
+        _report(logging.WARNING, "Telegram connection error")
+    else:
+        _report(logging.ERROR, f"Telegram error: {error}")
+
+def _configured_creds():
+    """Credentials read on the script thread, or None (with a warning) when not configured"""
     bot_token, chat_id = get_telegram_credentials()
-    
     if not bot_token or not chat_id:
         st.warning("⚠️ Telegram credentials not configured")
-        return False
+        return None
+    return bot_token, chat_id
+
+def _deliver(creds, message, silent=False):
+    """Send one message on the sender thread, waiting out 429s; returns whether it was delivered"""
+    bot_token, chat_id = creds
+    for attempt in range(1, SEND_ATTEMPTS + 1):
+        try:
+            response = _post_message(bot_token, chat_id, message, silent)
+        except requests.exceptions.RequestException as e:
+            _report_send_error(e)
+            return False
         
-    url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-    data = {"chat_id": chat_id, "text": message}
-    
-    try:
-        response = requests.post(url, data=data, timeout=10)
         if response.status_code == 200:
             return True
-        else:
-            st.warning(f"⚠️ Telegram message failed. Status: {response.status_code}")
-            return False
-    except requests.exceptions.Timeout:
-        st.warning("⚠️ Telegram message timeout")
-        return False
-    except requests.exceptions.ConnectionError:
-        st.warning("⚠️ Telegram connection error")
+        if response.status_code == 429 and attempt < SEND_ATTEMPTS:
+            # The limit is bot-wide, so holding the only sender thread is exactly what Telegram asks for
+            delay = _retry_after(response)
+            logger.warning("Telegram rate limit hit, retrying in %ss", delay)
+            time.sleep(delay)
+            continue
+        _report(logging.WARNING, f"Telegram message failed. Status: {response.status_code}")
         return False
-    except Exception as e:
-        st.error(f"❌ Telegram error: {e}")
+
+def send_telegram_message(message, silent=False, wait=False):
+    """Send message to Telegram in the background.
+    
+    Returns False when Telegram is not configured, otherwise True once queued; failures are shown
+    on a later rerun. With wait=True, blocks and returns whether the message was delivered.
+    """
+    show_telegram_errors()
+    creds = _configured_creds()
+    if creds is None:
         return False
+    future = _EXEC.submit(_deliver, creds, message, silent)
+    return future.result() if wait else True
 
-def send_liquidity_spike_alert(row):
-    """Send liquidity spike alert"""
-    message = (
+def liquidity_spike_message(row):
+    """Format a liquidity spike alert"""
+    return (
         f"⚡ Sudden Liquidity Spike!\n"
         f"Strike: {row['strikePrice']}\n"
         f"CE OI Chg: {row['changeinOpenInterest_CE']} | PE OI Chg: {row['changeinOpenInterest_PE']}\n"
         f"Vol CE: {row['totalTradedVolume_CE']} | PE: {row['totalTradedVolume_PE']}"
     )
-    return send_telegram_message(message)
+
+def _join_batches(entries):
+    """Join (message, future) entries into as few (text, futures) batches as fit ALERT_BATCH_CHARS each"""
+    batches = []
+    for message, future in entries:
+        if batches and len(batches[-1][0]) + len(ALERT_SEPARATOR) + len(message) <= ALERT_BATCH_CHARS:
+            batches[-1][0] += ALERT_SEPARATOR + message
+            batches[-1][1].append(future)
+        else:
+            batches.append([message, [future]])
+    return batches
+
+def _drain_alerts():
+    """Sender-thread job: wait briefly for more alerts, then send everything buffered"""
+    global _drain_scheduled
+    _batch_full.wait(ALERT_FLUSH_DELAY)
+    with _pending_lock:
+        pending = _pending_msgs[:]
+        _pending_msgs.clear()
+        _drain_scheduled = False
+        _batch_full.clear()
+    
+    # Silent alerts are batched separately so they never mute a notifying one
+    groups = {}
+    for creds, message, silent, future in pending:
+        groups.setdefault((creds, silent), []).append((message, future))
+    for (creds, silent), entries in groups.items():
+        for text, futures in _join_batches(entries):
+            delivered = _deliver(creds, text, silent)
+            for future in futures:
+                future.set_result(delivered)
+
+def queue_alert(message, silent=False, wait=False):
+    """Buffer an alert and send it with any others raised within ALERT_FLUSH_DELAY.
+    
+    Same contract as send_telegram_message: False when not configured, otherwise True once
+    buffered, or whether its batch was delivered with wait=True.
+    """
+    global _drain_scheduled
+    show_telegram_errors()
+    creds = _configured_creds()
+    if creds is None:
+        return False
+    
+    future = Future()
+    with _pending_lock:
+        _pending_msgs.append((creds, message, silent, future))
+        buffered = sum(len(m) + len(ALERT_SEPARATOR) for _, m, _, _ in _pending_msgs)
+        schedule = not _drain_scheduled
+        _drain_scheduled = True
+    
+    # A full batch goes out immediately instead of waiting out the flush delay
+    if buffered > ALERT_BATCH_CHARS:
+        _batch_full.set()
+    if schedule:
+        _EXEC.submit(_drain_alerts)
+    return future.result() if wait else True
+
+def send_liquidity_spike_alert(row):
+    """Send liquidity spike alert"""
+    return queue_alert(liquidity_spike_message(row), silent=True)  # Noisy feed, no push notification
 
 def send_trade_signal(atm_signal, suggested_trade, total_score, market_view, 
                      row, support_str, resistance_str, underlying, now):
@@ -68,7 +267,7 @@ def send_trade_signal(atm_signal, suggested_trade, total_score, market_view,
         f"ChgOI: {row['ChgOI_Bias']}, Volume: {row['Volume_Bias']}, Gamma: {row['Gamma_Bias']},\n"
         f"AskQty: {row['AskQty_Bias']}, BidQty: {row['BidQty_Bias']}, IV: {row['IV_Bias']}, DVP: {row['DVP_Bias']}"
     )
-    return send_telegram_message(message)
+    return queue_alert(message)
 
 def send_reversal_alert(atm_reversal_data, atm_strike, underlying, now):
     """Send reversal alert"""
@@ -85,7 +284,7 @@ def send_reversal_alert(atm_reversal_data, atm_strike, underlying, now):
         f"Spot: {underlying}\n"
         f"Time: {now.strftime('%H:%M:%S')}"
     )
-    return send_telegram_message(message)
+    return queue_alert(message)
 
 def send_expiry_day_signal(signal, underlying):
     """Send expiry day signal alert"""
@@ -99,7 +298,7 @@ def send_expiry_day_signal(signal, underlying):
         f"Reason: {signal['reason']}\n"
         f"Spot: {underlying}"
     )
-    return send_telegram_message(message)
+    return queue_alert(message)
 
 def send_error_alert(error_message):
     """Send error alert to Telegram"""
@@ -108,10 +307,7 @@ def send_error_alert(error_message):
 
 def send_startup_message():
     """Send startup notification"""
-    from datetime import datetime
-    from pytz import timezone
-    
-    now = datetime.now(timezone("Asia/Kolkata"))
+    now = datetime.now(IST)
     message = (
         f"🚀 Nifty Options Analyzer Started\n"
         f"Time: {now.strftime('%Y-%m-%d %H:%M:%S')}\n"
@@ -122,7 +318,7 @@ def send_startup_message():
 def test_telegram_connection():
     """Test Telegram connection and credentials"""
     test_message = "🧪 Test message from Nifty Options Analyzer"
-    success = send_telegram_message(test_message)
+    success = send_telegram_message(test_message, wait=True)
     
     if success:
         st.success("✅ Telegram connection successful!")
@@ -137,6 +333,7 @@ def add_telegram_test_ui():
     with st.sidebar:
         st.markdown("---")
         st.subheader("🔧 Telegram Test")
+        show_telegram_errors()
         
         if st.button("Test Telegram Connection"):
             test_telegram_connection()
@@ -144,7 +341,7 @@ def add_telegram_test_ui():
         # Custom message sender for testing
         custom_message = st.text_input("Send Custom Message:")
         if st.button("Send Custom Message") and custom_message:
-            success = send_telegram_message(custom_message)
+            success = send_telegram_message(custom_message, wait=True)
             if success:
                 st.success("Message sent!")
             else:
@@ -0,0 +1,60 @@
+"""Numba outcome kernel checked against the SciPy-based NumPy path it replaces"""
+import numpy as np
+import pytest
+
+pytest.importorskip("numba")
+
+import trade_simulator
+from trade_simulator import MIN_PRICE, TradeSimulator
+
+TRADE = {
+    'entry_price': 100.0,
+    'target': 150.0,
+    'stop_loss': 80.0,
+    'strike': 24000,
+    'quantity': 75,
+    'days_to_expiry': 7
+}
+MOVES = np.linspace(-1500, 1500, 301, dtype=np.float32)
+
+def simulate(monkeypatch, trade, use_numba):
+    """Run simulate_trade_outcome through the kernel or the NumPy reference path"""
+    monkeypatch.setattr(trade_simulator, "NUMBA_AVAILABLE", use_numba)
+    return TradeSimulator().simulate_trade_outcome(trade, MOVES)
+
+@pytest.mark.parametrize("option_type", ["CE", "PE"])
+def test_kernel_prices_match_reference(monkeypatch, option_type):
+    # Unreachable target/SL keep every scenario open, so exit_price is the raw model price
+    trade = dict(TRADE, option_type=option_type, target=1e9, stop_loss=0.0)
+    kernel = simulate(monkeypatch, trade, True)
+    reference = simulate(monkeypatch, trade, False)
+
+    np.testing.assert_allclose(kernel['exit_price'], reference['exit_price'], rtol=1e-3, atol=1e-2)
+
+@pytest.mark.parametrize("option_type", ["CE", "PE"])
+def test_kernel_outcomes_match_reference(monkeypatch, option_type):
+    trade = dict(TRADE, option_type=option_type)
+    kernel = simulate(monkeypatch, trade, True)
+    reference = simulate(monkeypatch, trade, False)
+
+    # Scenarios priced within rounding of a threshold may legitimately classify either way
+    prices = TradeSimulator()._bs_vec(MOVES, trade['strike'], option_type, trade['days_to_expiry'])
+    clear = (np.abs(prices - trade['target']) > 0.05) & (np.abs(prices - trade['stop_loss']) > 0.05)
+
+    assert (kernel['outcome'][clear] == reference['outcome'][clear]).all()
+    np.testing.assert_allclose(kernel['pnl'][clear], reference['pnl'][clear], rtol=1e-3, atol=1.0)
+
+def test_kernel_and_reference_return_same_dtypes(monkeypatch):
+    trade = dict(TRADE, option_type='CE')
+    kernel = simulate(monkeypatch, trade, True)
+    reference = simulate(monkeypatch, trade, False)
+
+    assert kernel.dtypes.equals(reference.dtypes)
+
+def test_kernel_floors_unpriceable_strike(monkeypatch):
+    trade = dict(TRADE, option_type='CE', strike=0, target=1e9, stop_loss=0.0)
+    kernel = simulate(monkeypatch, trade, True)
+    reference = simulate(monkeypatch, trade, False)
+
+    np.testing.assert_allclose(kernel['exit_price'], MIN_PRICE)
+    np.testing.assert_allclose(reference['exit_price'], MIN_PRICE)
@@ -6,6 +6,112 @@ from plotly.subplots import make_subplots
 from datetime import datetime, timedelta
 from pytz import timezone
 import math
+from scipy.special import ndtr
+from ui_components import get_log_df
+
+# Optional JIT for the fused pricing + outcome kernel; the NumPy path is used without it
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Simulation pricing assumptions
+R_FREE = 0.06  # Risk-free rate
+SPOT_REF = 24000  # Reference spot the scenarios move from
+MIN_PRICE = 0.05  # Floor for simulated option prices
+DEFAULT_IV = 20  # Implied volatility (%) used for scenario pricing
+PORTFOLIO_DAYS_TO_EXPIRY = 7  # Assumed expiry for logged trades, which don't record one
+LOT_SIZE = 75
+MIN_T = 0.001  # Floor on time to expiry (years) so d1 never divides by zero
+
+# Outcome labels indexed by the integer codes from simulate_trade_outcome
+OUTCOME_LABELS = np.array(["Target Hit", "Stop Loss Hit", "Open"])
+
+# Chart colours keyed by outcome so they follow value_counts order
+OUTCOME_BAR_COLORS = {"Target Hit": "green", "Stop Loss Hit": "red", "Open": "gray"}
+OUTCOME_PIE_COLORS = {"Target Hit": "#28a745", "Stop Loss Hit": "#dc3545", "Open": "#6c757d"}
+
+# Red / yellow / green anchors of the RdYlGn scale used to shade the P&L column
+PNL_GRADIENT_RGB = np.array([[215, 48, 39], [255, 255, 191], [26, 152, 80]])
+
+def bs_price_grid(S, K, T, is_call, sigma=DEFAULT_IV / 100):
+    """Black-Scholes prices for broadcastable spot/strike/expiry arrays, mixing calls and puts"""
+    # Work in the spot array's float precision; scalar inputs are cast so they don't upcast it
+    S = np.asarray(S)
+    dtype = S.dtype if S.dtype.kind == 'f' else np.float64
+    S = np.maximum(S.astype(dtype, copy=False), MIN_PRICE)  # log never sees a non-positive price
+    K, T, sigma = (np.asarray(x, dtype=dtype) for x in (K, T, sigma))
+    T = np.maximum(T, MIN_T)
+    
+    # Degenerate strikes or vols have no time value to price; they get the floor price
+    priceable = (K > 0) & (sigma > 0)
+    K = np.where(priceable, K, 1)
+    sigma = np.where(priceable, sigma, 1)
+    
+    sigma_sqrt_t = sigma * np.sqrt(T)
+    d1 = (np.log(S / K) + (R_FREE + 0.5 * sigma * sigma) * T) / sigma_sqrt_t
+    discounted_strike = K * np.exp(-R_FREE * T)
+    call = S * ndtr(d1) - discounted_strike * ndtr(d1 - sigma_sqrt_t)
+    
+    # Puts from put-call parity so every trade shares one ndtr pass
+    price = np.maximum(np.where(is_call, call, call - S + discounted_strike), MIN_PRICE)
+    return np.where(priceable, price, MIN_PRICE)
+
+def pnl_gradient_css(pnl):
+    """Cell styles shading P&L from red (min) to green (max), computed for the whole column at once"""
+    pnl = np.asarray(pnl, dtype=float)
+    span = pnl.max() - pnl.min()
+    pos = (pnl - pnl.min()) / span * 2 if span else np.ones_like(pnl)
+    rgb = np.column_stack([np.interp(pos, [0, 1, 2], PNL_GRADIENT_RGB[:, c]) for c in range(3)]).astype(int)
+    return [f"background-color: rgb({r}, {g}, {b}); color: black" for r, g, b in rgb]
+
+if NUMBA_AVAILABLE:
+    @numba.njit(cache=True, fastmath=True, inline='always')
+    def _norm_cdf_nb(x):
+        """Standard normal CDF via erfc, which numba compiles natively; shared by the kernels"""
+        return 0.5 * math.erfc(-x / math.sqrt(2.0))
+    
+    @numba.njit(fastmath=True, cache=True)
+    def _simulate_kernel(spot_moves, spot, strike, is_call, T, sigma, r, entry, target, sl, qty):
+        """Fused Black-Scholes pricing, target/SL check and P&L for every spot movement"""
+        n = spot_moves.shape[0]
+        # Results take the scenario dtype, matching the NumPy path
+        exit_price = np.empty_like(spot_moves)
+        pnl = np.empty_like(spot_moves)
+        code = np.empty(n, dtype=np.int64)
+        
+        # Same degenerate-input rule as bs_price_grid: nothing to price, floor price everywhere
+        priceable = strike > 0 and sigma > 0
+        sigma_sqrt_t = sigma * math.sqrt(T)
+        drift = (r + 0.5 * sigma * sigma) * T
+        discounted_strike = strike * math.exp(-r * T)
+        
+        for i in range(n):
+            price = MIN_PRICE
+            if priceable:
+                S = max(spot + spot_moves[i], MIN_PRICE)
+                d1 = (math.log(S / strike) + drift) / sigma_sqrt_t
+                d2 = d1 - sigma_sqrt_t
+                
+                if is_call:
+                    price = S * _norm_cdf_nb(d1) - discounted_strike * _norm_cdf_nb(d2)
+                else:
+                    price = discounted_strike * _norm_cdf_nb(-d2) - S * _norm_cdf_nb(-d1)
+                price = max(price, MIN_PRICE)
+            
+            if price >= target:
+                code[i] = 0
+                exit_price[i] = target
+            elif price <= sl:
+                code[i] = 1
+                exit_price[i] = sl
+            else:
+                code[i] = 2
+                exit_price[i] = price
+            pnl[i] = (exit_price[i] - entry) * qty
+        
+        return exit_price, pnl, code
 
 class TradeSimulator:
     def __init__(self):
@@ -18,41 +124,14 @@ class TradeSimulator:
         if 'simulation_results' not in st.session_state:
             st.session_state.simulation_results = {}
     
-    def calculate_option_price_movement(self, spot_move, strike, option_type, days_to_expiry, iv=20):
-        """Simulate option price based on spot movement (simplified Black-Scholes)"""
-        try:
-            # Simplified option pricing for simulation
-            S = 24000 + spot_move  # New spot price
-            K = strike
-            T = max(days_to_expiry / 365, 0.001)  # Time to expiry
-            r = 0.06  # Risk-free rate
-            sigma = iv / 100  # Implied volatility
-            
-            # Calculate d1 and d2
-            d1 = (math.log(S / K) + (r + 0.5 * sigma**2) * T) / (sigma * math.sqrt(T))
-            d2 = d1 - sigma * math.sqrt(T)
-            
-            # Black-Scholes formula
-            if option_type == 'CE':
-                from scipy.stats import norm
-                option_price = S * norm.cdf(d1) - K * math.exp(-r * T) * norm.cdf(d2)
-            else:  # PE
-                from scipy.stats import norm
-                option_price = K * math.exp(-r * T) * norm.cdf(-d2) - S * norm.cdf(-d1)
-            
-            return max(option_price, 0.05)  # Minimum price of 0.05
-            
-        except:
-            # Fallback to simple linear approximation
-            if option_type == 'CE':
-                return max(spot_move * 0.5, 0.05) if spot_move > 0 else max(-spot_move * 0.3, 0.05)
-            else:
-                return max(-spot_move * 0.5, 0.05) if spot_move < 0 else max(spot_move * 0.3, 0.05)
+    def _bs_vec(self, spot_moves, strike, option_type, days_to_expiry, iv=DEFAULT_IV, spot=SPOT_REF):
+        """Option prices for an array of spot movements (simplified Black-Scholes)"""
+        # Same pricer and degenerate-input handling as the portfolio grid
+        return bs_price_grid(spot + np.asarray(spot_moves), strike, days_to_expiry / 365,
+                             option_type == 'CE', iv / 100)
     
     def simulate_trade_outcome(self, trade_data, spot_movements):
         """Simulate trade outcome for different spot movements"""
-        results = []
-        
         entry_price = trade_data['entry_price']
         target = trade_data['target']
         stop_loss = trade_data['stop_loss']
@@ -61,36 +140,34 @@ class TradeSimulator:
         quantity = trade_data['quantity']
         days_to_expiry = trade_data.get('days_to_expiry', 7)
         
-        for spot_move in spot_movements:
-            # Calculate new option price
-            new_price = self.calculate_option_price_movement(
-                spot_move, strike, option_type, days_to_expiry
+        if NUMBA_AVAILABLE:
+            # One fused pass: price, classify and P&L without intermediate arrays
+            moves = np.asarray(spot_movements)
+            if moves.dtype.kind != 'f':
+                moves = moves.astype(np.float64)
+            exit_prices, pnl, code = _simulate_kernel(
+                moves, float(SPOT_REF), float(strike),
+                option_type == 'CE', max(days_to_expiry / 365, MIN_T), DEFAULT_IV / 100, R_FREE,
+                float(entry_price), float(target), float(stop_loss), float(quantity)
             )
+        else:
+            # Price every scenario in one vectorized call
+            new_prices = self._bs_vec(spot_movements, strike, option_type, days_to_expiry)
             
-            # Determine trade outcome
-            if new_price >= target:
-                exit_price = target
-                outcome = "Target Hit"
-                pnl = (exit_price - entry_price) * quantity
-            elif new_price <= stop_loss:
-                exit_price = stop_loss
-                outcome = "Stop Loss Hit"
-                pnl = (exit_price - entry_price) * quantity
-            else:
-                exit_price = new_price
-                outcome = "Open"
-                pnl = (exit_price - entry_price) * quantity
-            
-            results.append({
-                'spot_move': spot_move,
-                'new_spot': 24000 + spot_move,  # Assuming current spot is 24000
-                'exit_price': exit_price,
-                'pnl': pnl,
-                'pnl_percent': (pnl / (entry_price * quantity)) * 100,
-                'outcome': outcome
-            })
-        
-        return results
+            # Classify every scenario at once: 0 = target, 1 = stop loss, 2 = still open
+            code = np.where(new_prices >= target, 0, np.where(new_prices <= stop_loss, 1, 2))
+            # Target/SL cast to the scenario dtype so np.choose doesn't upcast float32 results
+            exit_prices = np.choose(code, (new_prices.dtype.type(target), new_prices.dtype.type(stop_loss), new_prices))
+            pnl = (exit_prices - entry_price) * quantity
+        
+        return pd.DataFrame({
+            'spot_move': spot_movements,
+            'new_spot': SPOT_REF + spot_movements,  # Assuming current spot is SPOT_REF
+            'exit_price': exit_prices,
+            'pnl': pnl,
+            'pnl_percent': pnl / (entry_price * quantity) * 100,
+            'outcome': OUTCOME_LABELS[code]
+        })
     
     def render_trade_simulator_ui(self):
         """Render the main trade simulator interface"""
@@ -209,18 +286,16 @@ class TradeSimulator:
             }
             
             # Generate spot movements
-            spot_movements = np.linspace(-spot_range, spot_range, simulation_points)
+            spot_movements = np.linspace(-spot_range, spot_range, simulation_points, dtype=np.float32)
             
             # Run simulation
-            results = self.simulate_trade_outcome(trade_data, spot_movements)
+            df_results = self.simulate_trade_outcome(trade_data, spot_movements)
             
             # Display results
-            self.display_simulation_results(trade_data, results)
+            self.display_simulation_results(trade_data, df_results)
     
-    def display_simulation_results(self, trade_data, results):
+    def display_simulation_results(self, trade_data, df_results):
         """Display simulation results with charts and statistics"""
-        df_results = pd.DataFrame(results)
-        
         # Summary statistics
         st.markdown("### 📊 Simulation Results")
         
@@ -228,7 +303,7 @@ class TradeSimulator:
         
         max_profit = df_results['pnl'].max()
         max_loss = df_results['pnl'].min()
-        profitable_scenarios = len(df_results[df_results['pnl'] > 0])
+        profitable_scenarios = int((df_results['pnl'].to_numpy() > 0).sum())
         total_scenarios = len(df_results)
         
         with col1:
@@ -255,7 +330,7 @@ class TradeSimulator:
                     'exit_price': '{:.2f}',
                     'pnl': '₹{:,.0f}',
                     'pnl_percent': '{:+.1f}%'
-                }).background_gradient(subset=['pnl'], cmap='RdYlGn'),
+                }).apply(pnl_gradient_css, subset=['pnl']),
                 use_container_width=True
             )
     
@@ -269,7 +344,8 @@ class TradeSimulator:
         )
         
         # Main P&L chart
-        colors = ['red' if pnl < 0 else 'green' if pnl > 0 else 'gray' for pnl in df_results['pnl']]
+        pnl = df_results['pnl'].to_numpy()
+        colors = np.where(pnl < 0, 'red', np.where(pnl > 0, 'green', 'gray'))
         
         fig.add_trace(
             go.Scatter(
@@ -306,7 +382,7 @@ class TradeSimulator:
                 x=outcomes.index,
                 y=outcomes.values,
                 name='Outcomes',
-                marker_color=['green', 'red', 'gray'],
+                marker_color=outcomes.index.map(OUTCOME_BAR_COLORS),
                 showlegend=False
             ),
             row=2, col=1
@@ -333,7 +409,7 @@ class TradeSimulator:
             labels=outcomes.index,
             values=outcomes.values,
             hole=0.4,
-            marker_colors=['#28a745', '#dc3545', '#6c757d']
+            marker_colors=outcomes.index.map(OUTCOME_PIE_COLORS)
         )])
         
         fig.update_layout(
@@ -396,53 +472,51 @@ class TradeSimulator:
         st.info("🔄 Running Monte Carlo simulation...")
         
         # Convert trade log to portfolio
-        trades_df = pd.DataFrame(st.session_state.trade_log)
-        
-        # Simulate price paths
-        simulation_results = []
-        
-        for sim in range(num_sims):
-            portfolio_value = initial_capital
-            daily_returns = []
-            
-            # Generate random price path
-            daily_changes = np.random.normal(0, volatility/100, days)
-            
-            # Calculate portfolio performance
-            for day in range(days):
-                day_pnl = 0
-                
-                # Apply daily change to each trade
-                for _, trade in trades_df.iterrows():
-                    spot_change = daily_changes[day] * 24000  # Assuming spot around 24000
-                    
-                    # Simplified P&L calculation
-                    if trade['Type'] == 'CE':
-                        trade_pnl = max(spot_change * 0.5, -trade['LTP'] * 25) * 75  # 75 qty
-                    else:
-                        trade_pnl = max(-spot_change * 0.5, -trade['LTP'] * 25) * 75
-                    
-                    day_pnl += trade_pnl
-                
-                portfolio_value += day_pnl
-                daily_returns.append(portfolio_value)
-            
-            simulation_results.append(daily_returns)
+        trades_df = get_log_df('trade_log')
+        
+        # Per-trade option type and strike, extracted once (ATM at the start spot if unknown)
+        price_data = st.session_state.get('price_data')
+        spot = float(price_data['Spot'].iloc[-1]) if price_data is not None and not price_data.empty else SPOT_REF
+        is_call = trades_df['Type'].to_numpy() == 'CE'
+        if 'Strike' in trades_df:
+            strikes = pd.to_numeric(trades_df['Strike'], errors='coerce').fillna(spot).to_numpy(dtype=np.float32)
+        else:
+            strikes = np.full(len(trades_df), spot, dtype=np.float32)
+        
+        # Draw every sim's daily spot change at once and walk the spot paths (sims x days)
+        daily_changes = np.random.normal(0, volatility/100, size=(num_sims, days)).astype(np.float32)
+        spot_paths = spot + np.cumsum(daily_changes * spot, axis=1)
+        
+        # Time to expiry left at the end of each day (bs_price_grid floors it at MIN_T)
+        days_left = np.maximum(PORTFOLIO_DAYS_TO_EXPIRY - np.arange(1, days + 1), 0)
+        T = (days_left / 365).astype(np.float32)
+        
+        # Reprice every trade on every sim and day in one broadcast pass (sims x days x trades)
+        prices = bs_price_grid(spot_paths[:, :, None], strikes, T[:, None], is_call)
+        entry_prices = bs_price_grid(np.float32(spot), strikes, np.float32(PORTFOLIO_DAYS_TO_EXPIRY / 365), is_call)
+        
+        # Scale each trade's model prices so day 0 sits at its logged LTP (model price if LTP is missing)
+        if 'LTP' in trades_df:
+            ltp = pd.to_numeric(trades_df['LTP'], errors='coerce').to_numpy(dtype=np.float32)
+            scale = np.where(ltp > 0, ltp / entry_prices, 1).astype(np.float32)
+        else:
+            scale = np.ones(len(trades_df), dtype=np.float32)
+        
+        # Portfolio value paths (sims x days): P&L of every trade at one lot each against its entry LTP
+        paths = initial_capital + ((prices - entry_prices) * scale).sum(axis=2) * LOT_SIZE
         
         # Display results
-        self.display_portfolio_results(simulation_results, initial_capital, days)
+        self.display_portfolio_results(paths, initial_capital, days)
     
-    def display_portfolio_results(self, simulation_results, initial_capital, days):
-        """Display portfolio simulation results"""
-        df_sims = pd.DataFrame(simulation_results).T
-        
+    def display_portfolio_results(self, paths, initial_capital, days):
+        """Display portfolio simulation results from the (sims x days) value paths"""
         # Calculate statistics
-        final_values = df_sims.iloc[-1]
+        final_values = paths[:, -1]
         
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            median_return = ((final_values.median() - initial_capital) / initial_capital) * 100
+            median_return = ((np.median(final_values) - initial_capital) / initial_capital) * 100
             st.metric("📈 Median Return", f"{median_return:+.1f}%")
         
         with col2:
@@ -454,37 +528,39 @@ class TradeSimulator:
             st.metric("🚀 Best Case", f"{best_case:+.1f}%")
         
         with col4:
-            profitable_sims = len(final_values[final_values > initial_capital])
+            profitable_sims = int((final_values > initial_capital).sum())
             win_rate = (profitable_sims / len(final_values)) * 100
             st.metric("🎯 Success Rate", f"{win_rate:.1f}%")
         
         # Plot simulation paths
         fig = go.Figure()
         
-        # Add sample paths (max 50 for performance)
-        sample_size = min(50, df_sims.shape[1])
-        for i in range(sample_size):
-            fig.add_trace(
-                go.Scatter(
-                    x=list(range(days)),
-                    y=df_sims.iloc[:, i],
-                    mode='lines',
-                    line=dict(color='lightblue', width=1),
-                    showlegend=False,
-                    hoverinfo='skip'
-                )
+        # Add sample paths (max 50) as one NaN-separated trace instead of one trace per path
+        sample_size = min(50, paths.shape[0])
+        sample = np.column_stack([paths[:sample_size], np.full(sample_size, np.nan)])
+        fig.add_trace(
+            go.Scatter(
+                x=np.tile(np.r_[np.arange(days), np.nan], sample_size),
+                y=sample.ravel(),
+                mode='lines',
+                line=dict(color='lightblue', width=1),
+                connectgaps=False,
+                showlegend=False,
+                hoverinfo='skip'
             )
+        )
         
-        # Add percentiles
+        # Add percentiles, computed for every day in one pass
         percentiles = [10, 25, 50, 75, 90]
         colors = ['red', 'orange', 'blue', 'orange', 'red']
         names = ['10th', '25th', '50th (Median)', '75th', '90th']
+        percentile_paths = np.percentile(paths, percentiles, axis=0)
         
-        for i, (p, color, name) in enumerate(zip(percentiles, colors, names)):
+        for values, color, name in zip(percentile_paths, colors, names):
             fig.add_trace(
                 go.Scatter(
-                    x=list(range(days)),
-                    y=df_sims.quantile(p/100, axis=1),
+                    x=np.arange(days),
+                    y=values,
                     mode='lines',
                     line=dict(color=color, width=3),
                     name=f'{name} percentile'
@@ -509,7 +585,7 @@ class TradeSimulator:
             st.info("📝 No historical trades to analyze!")
             return
         
-        trades_df = pd.DataFrame(st.session_state.trade_log)
+        trades_df = get_log_df('trade_log')
         
         # Add some analysis here
         st.markdown("**🔍 Trade Statistics**")
@@ -521,11 +597,11 @@ class TradeSimulator:
             st.metric("Total Trades", total_trades)
         
         with col2:
-            ce_trades = len(trades_df[trades_df['Type'] == 'CE'])
+            ce_trades = int((trades_df['Type'].to_numpy() == 'CE').sum())
             st.metric("CE Trades", ce_trades)
         
         with col3:
-            pe_trades = len(trades_df[trades_df['Type'] == 'PE'])
+            pe_trades = int((trades_df['Type'].to_numpy() == 'PE').sum())
             st.metric("PE Trades", pe_trades)
         
         # Trade distribution chart
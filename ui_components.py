@@ -7,68 +7,155 @@ import io
 from datetime import datetime
 from pytz import timezone
 
-def display_enhanced_trade_log():
-    """Display enhanced trade log with improved styling and live P&L"""
-    if not st.session_state.trade_log:
-        st.info("📝 No trades logged yet. Signals will appear here when generated.")
-        return
-        
-    st.markdown("### 📜 Live Trade Log")
-    df_trades = pd.DataFrame(st.session_state.trade_log)
+IST = timezone("Asia/Kolkata")
+
+# Faster Excel writer when installed; openpyxl remains the fallback engine
+try:
+    import xlsxwriter
+    EXCEL_ENGINE = 'xlsxwriter'
+except ImportError:
+    EXCEL_ENGINE = 'openpyxl'
+
+def append_to_log(log_key, entry):
+    """Append an entry to a session-state log and mark its DataFrame view stale"""
+    st.session_state[log_key].append(entry)
+    st.session_state[f"_{log_key}_dirty"] = True
+
+def append_price_point(spot, now):
+    """Append a spot reading to price_data, keeping Time as datetime64 so charts need no parsing"""
+    new_row = pd.DataFrame({"Time": [pd.Timestamp(now).tz_localize(None)], "Spot": [float(spot)]})
+    price_data = st.session_state['price_data']
+    
+    # Concatenating onto the empty object-dtype seed frame would leave both columns as object
+    st.session_state['price_data'] = new_row if price_data.empty else pd.concat([price_data, new_row], ignore_index=True)
+
+def get_log_df(log_key, dtypes=None):
+    """Return the DataFrame view of a session-state log, rebuilt only when it changed"""
+    records = st.session_state[log_key]
+    df_key, dirty_key = f"_{log_key}_df", f"_{log_key}_dirty"
+    cached = st.session_state.get(df_key)
+    
+    # Rebuild when flagged dirty or when the list was appended to directly
+    if cached is None or st.session_state.get(dirty_key, True) or len(cached) != len(records):
+        cached = pd.DataFrame(records)
+        if dtypes:
+            cached = cached.astype({col: dtype for col, dtype in dtypes.items() if col in cached})
+        st.session_state[df_key] = cached
+        st.session_state[dirty_key] = False
+    
+    return cached
+
+# Low-cardinality call log columns stored as categoricals
+CALL_LOG_DTYPES = {'Type': 'category', 'Status': 'category'}
+
+# Compact dtypes for the simulated P&L columns of the trade log
+PNL_DTYPES = {
+    'LTP': 'float32',
+    'Current_Price': 'float32',
+    'Qty': 'int16',
+    'Unrealized_PL': 'float32',
+    'Return_%': 'float32',
+    'Status': pd.CategoricalDtype(['🟢 Profit', '🔴 Loss', '🟡 Breakeven'])
+}
+
+# Cell CSS looked up by code, so stylers gather from these arrays instead of building strings per cell
+PROFIT_CSS = 'background-color: #d4edda; color: #155724; font-weight: bold'
+LOSS_CSS = 'background-color: #f8d7da; color: #721c24; font-weight: bold'
+BREAKEVEN_CSS = 'background-color: #fff3cd; color: #856404'
+ACTIVE_CSS = 'background-color: #d1ecf1; color: #0c5460; font-weight: bold'
+PNL_CSS = np.array([PROFIT_CSS, LOSS_CSS, BREAKEVEN_CSS])
+RETURN_CSS = np.array(['color: #28a745; font-weight: bold', 'color: #dc3545; font-weight: bold', 'color: #ffc107'])
+CALL_STATUS_CSS = np.array([PROFIT_CSS, LOSS_CSS, ACTIVE_CSS, ''])
+
+def color_pnl(col):
+    """Cell styles for the Unrealized_PL column"""
+    pl = col.to_numpy()
+    return PNL_CSS[np.select([pl > 100, pl < -100], [0, 1], default=2)]
+
+def color_return(col):
+    """Cell styles for the Return_% column"""
+    ret = col.to_numpy()
+    return RETURN_CSS[np.select([ret > 5, ret < -5], [0, 1], default=2)]
+
+def get_trade_pnl_df():
+    """Trade log with simulated live P&L columns, recomputed only when the log changes"""
+    base = get_log_df('trade_log')
+    cached = st.session_state.get('_trade_log_pnl')
+    if cached is not None and cached[0] is base:
+        return cached[1]
+    
+    df_trades = base.copy()
     
     # Add live P&L simulation (in real implementation, use live prices)
     if 'Current_Price' not in df_trades.columns:
-        # Simulate current prices with some randomness
-        np.random.seed(42)  # For consistent demo
-        price_multipliers = np.random.uniform(0.8, 1.4, len(df_trades))
+        # Simulate current prices with some randomness (own seeded generator, leaves np.random alone)
+        price_multipliers = np.random.default_rng(42).uniform(0.8, 1.4, len(df_trades))
         df_trades['Current_Price'] = df_trades['LTP'] * price_multipliers
         
-        # Calculate P&L (assuming 1 lot = 75 quantity)
+        # Calculate P&L (assuming 1 lot = 75 quantity); the price change is shared with Return_%
         df_trades['Qty'] = 75
-        df_trades['Unrealized_PL'] = (df_trades['Current_Price'] - df_trades['LTP']) * df_trades['Qty']
+        price_change = df_trades['Current_Price'] - df_trades['LTP']
+        df_trades['Unrealized_PL'] = price_change * df_trades['Qty']
         
         # Add status based on P&L
-        df_trades['Status'] = df_trades['Unrealized_PL'].apply(
-            lambda x: '🟢 Profit' if x > 100 else '🔴 Loss' if x < -100 else '🟡 Breakeven'
-        )
+        pl = df_trades['Unrealized_PL'].to_numpy()
+        df_trades['Status'] = np.select([pl > 100, pl < -100], ['🟢 Profit', '🔴 Loss'], default='🟡 Breakeven')
         
         # Add percentage returns
-        df_trades['Return_%'] = ((df_trades['Current_Price'] - df_trades['LTP']) / df_trades['LTP'] * 100).round(2)
-    
-    # Style the dataframe with color coding
-    def style_pnl_row(row):
-        colors = []
-        for col in row.index:
-            if col == 'Unrealized_PL':
-                if row[col] > 100:
-                    colors.append('background-color: #d4edda; color: #155724; font-weight: bold')
-                elif row[col] < -100:
-                    colors.append('background-color: #f8d7da; color: #721c24; font-weight: bold')
-                else:
-                    colors.append('background-color: #fff3cd; color: #856404')
-            elif col == 'Return_%':
-                if row[col] > 5:
-                    colors.append('color: #28a745; font-weight: bold')
-                elif row[col] < -5:
-                    colors.append('color: #dc3545; font-weight: bold')
-                else:
-                    colors.append('color: #ffc107')
-            else:
-                colors.append('')
-        return colors
-    
-    # Display styled dataframe
-    styled_trades = df_trades.style.apply(style_pnl_row, axis=1)
+        df_trades['Return_%'] = price_change / df_trades['LTP'] * 100
+        
+        # Narrow the computed columns; Status has only three values
+        df_trades = df_trades.astype(PNL_DTYPES)
+    
+    st.session_state['_trade_log_pnl'] = (base, df_trades)
+    return df_trades
+
+def cached_payload(cache_key, sources, build):
+    """Reuse a serialized payload while its source frames (same objects) and scalars are unchanged"""
+    cached = st.session_state.get(cache_key)
+    if cached is not None and len(cached[0]) == len(sources) and all(
+        old is new or (not isinstance(new, pd.DataFrame) and old == new)
+        for old, new in zip(cached[0], sources)
+    ):
+        return cached[1]
+    
+    payload = build()
+    st.session_state[cache_key] = (sources, payload)
+    return payload
+
+def color_call_status(col):
+    """Cell styles for the call log Status column"""
+    status = col.astype(object).to_numpy()
+    return CALL_STATUS_CSS[np.select([status == 'Hit Target', status == 'Hit Stoploss', status == 'Active'],
+                                     [0, 1, 2], default=3)]
+
+def display_enhanced_trade_log():
+    """Display enhanced trade log with improved styling and live P&L"""
+    if not st.session_state.trade_log:
+        st.info("📝 No trades logged yet. Signals will appear here when generated.")
+        return
+        
+    st.markdown("### 📜 Live Trade Log")
+    df_trades = get_trade_pnl_df()
+    
+    # Display styled dataframe, styling only the P&L columns
+    styled_trades = (df_trades.style
+                     .format({'Return_%': '{:+.2f}%', 'Unrealized_PL': '₹{:,.0f}',
+                              'Current_Price': '{:.2f}', 'LTP': '{:.2f}'}, precision=2)
+                     .apply(color_pnl, subset=['Unrealized_PL'])
+                     .apply(color_return, subset=['Return_%']))
     st.dataframe(styled_trades, use_container_width=True)
     
     # Summary statistics in columns
     col1, col2, col3, col4 = st.columns(4)
     
-    total_pl = df_trades['Unrealized_PL'].sum()
-    winning_trades = len(df_trades[df_trades['Unrealized_PL'] > 0])
-    total_trades = len(df_trades)
+    pl = df_trades['Unrealized_PL'].to_numpy()
+    returns = df_trades['Return_%'].to_numpy()
+    total_pl = np.nansum(pl)
+    winning_trades = int((pl > 0).sum())
+    total_trades = pl.size
     win_rate = (winning_trades / total_trades * 100) if total_trades > 0 else 0
-    avg_return = df_trades['Return_%'].mean()
+    avg_return = np.nanmean(returns) if returns.size else 0.0
     
     with col1:
         st.metric("💰 Total P&L", f"₹{total_pl:,.0f}", 
@@ -85,24 +172,37 @@ def display_enhanced_trade_log():
     with col4:
         st.metric("📈 Total Trades", total_trades)
 
+@st.cache_data(show_spinner=False)
+def simulated_volume(n):
+    """Demo volume bars; seeded so existing bars stay put as the series grows"""
+    return np.random.default_rng(0).integers(1000, 10000, n)
+
 def plot_price_with_sr():
     """Enhanced price chart with support/resistance and volume"""
-    price_df = st.session_state['price_data'].copy()
+    price_df = st.session_state['price_data']
     
     if price_df.empty or price_df['Spot'].isnull().all():
         st.info("📈 Price chart will appear once data accumulates...")
         return
         
-    # Ensure proper datetime conversion
-    price_df['Time'] = pd.to_datetime(price_df['Time'], format='%H:%M:%S', errors='coerce')
+    # Time is stored as datetime64 by append_price_point; parse only legacy string rows
+    if not pd.api.types.is_datetime64_any_dtype(price_df['Time']):
+        price_df = price_df.assign(Time=pd.to_datetime(price_df['Time'], format='%H:%M:%S', errors='coerce'))
     price_df = price_df.dropna(subset=['Time', 'Spot'])
     
-    if price_df.empty:
+    # A line and volume profile need at least two points; skip building the figure until then
+    if len(price_df) < 2:
+        st.info("📈 Price chart will appear once data accumulates...")
         return
     
-    # Get zones
+    # Get zones and check once whether each is fully set
     support_zone = st.session_state.get('support_zone', (None, None))
     resistance_zone = st.session_state.get('resistance_zone', (None, None))
+    has_support = all(support_zone)
+    has_resistance = all(resistance_zone)
+    
+    # Time span shared by both zone rectangles
+    t_min, t_max = price_df['Time'].min(), price_df['Time'].max()
     
     # Create subplot with secondary y-axis
     fig = make_subplots(
@@ -112,9 +212,9 @@ def plot_price_with_sr():
         vertical_spacing=0.05
     )
     
-    # Main price line
+    # Main price line, drawn with WebGL so long intraday series stay responsive
     fig.add_trace(
-        go.Scatter(
+        go.Scattergl(
             x=price_df['Time'], 
             y=price_df['Spot'], 
             mode='lines+markers', 
@@ -126,12 +226,12 @@ def plot_price_with_sr():
     )
     
     # Add support zone
-    if all(support_zone) and None not in support_zone:
+    if has_support:
         # Support zone fill
         fig.add_shape(
             type="rect",
             xref="x", yref="y",
-            x0=price_df['Time'].min(), x1=price_df['Time'].max(),
+            x0=t_min, x1=t_max,
             y0=support_zone[0], y1=support_zone[1],
             fillcolor="rgba(40, 167, 69, 0.15)", 
             line=dict(width=0),
@@ -150,12 +250,12 @@ def plot_price_with_sr():
             )
     
     # Add resistance zone
-    if all(resistance_zone) and None not in resistance_zone:
+    if has_resistance:
         # Resistance zone fill
         fig.add_shape(
             type="rect",
             xref="x", yref="y",
-            x0=price_df['Time'].min(), x1=price_df['Time'].max(),
+            x0=t_min, x1=t_max,
             y0=resistance_zone[0], y1=resistance_zone[1],
             fillcolor="rgba(220, 53, 69, 0.15)", 
             line=dict(width=0),
@@ -174,18 +274,17 @@ def plot_price_with_sr():
             )
     
     # Add volume bars (simulated for demo)
-    if len(price_df) > 1:
-        volume_data = np.random.randint(1000, 10000, len(price_df))
-        fig.add_trace(
-            go.Bar(
-                x=price_df['Time'],
-                y=volume_data,
-                name='Volume',
-                marker_color='rgba(158, 158, 158, 0.6)',
-                showlegend=False
-            ),
-            row=2, col=1
-        )
+    volume_data = simulated_volume(len(price_df))
+    fig.add_trace(
+        go.Bar(
+            x=price_df['Time'],
+            y=volume_data,
+            name='Volume',
+            marker_color='rgba(158, 158, 158, 0.6)',
+            showlegend=False
+        ),
+        row=2, col=1
+    )
     
     # Update layout with modern styling
     fig.update_layout(
@@ -197,6 +296,7 @@ def plot_price_with_sr():
         },
         template="plotly_white",
         hovermode='x unified',
+        uirevision='price',  # Keep zoom/pan across reruns
         showlegend=True,
         legend=dict(
             orientation="h",
@@ -240,7 +340,7 @@ def display_call_log_book():
             
             if st.button("📝 Add Call"):
                 new_call = {
-                    "Time": datetime.now(timezone("Asia/Kolkata")).strftime("%Y-%m-%d %H:%M:%S"),
+                    "Time": datetime.now(IST).strftime("%Y-%m-%d %H:%M:%S"),
                     "Type": call_type,
                     "Strike": strike,
                     "Entry": entry_price,
@@ -249,41 +349,26 @@ def display_call_log_book():
                     "Status": "Active",
                     "Notes": notes
                 }
-                st.session_state.call_log_book.append(new_call)
+                append_to_log('call_log_book', new_call)
                 st.success("✅ Call added to log book!")
-                st.experimental_rerun()
+                st.rerun()
         
         return
     
     # Display existing calls
-    df_log = pd.DataFrame(st.session_state.call_log_book)
-    
-    # Style the call log
-    def style_call_status(row):
-        colors = []
-        for col in row.index:
-            if col == 'Status':
-                if row[col] == 'Hit Target':
-                    colors.append('background-color: #d4edda; color: #155724; font-weight: bold')
-                elif row[col] == 'Hit Stoploss':
-                    colors.append('background-color: #f8d7da; color: #721c24; font-weight: bold')
-                elif row[col] == 'Active':
-                    colors.append('background-color: #d1ecf1; color: #0c5460; font-weight: bold')
-                else:
-                    colors.append('')
-            else:
-                colors.append('')
-        return colors
-    
-    styled_log = df_log.style.apply(style_call_status, axis=1)
+    df_log = get_log_df('call_log_book', CALL_LOG_DTYPES)
+    
+    # Style the call log, touching only the Status column
+    styled_log = df_log.style.apply(color_call_status, subset=['Status'])
     st.dataframe(styled_log, use_container_width=True)
     
     # Call log statistics
     col1, col2, col3 = st.columns(3)
     
-    active_calls = len(df_log[df_log['Status'] == 'Active'])
-    hit_targets = len(df_log[df_log['Status'] == 'Hit Target'])
-    hit_sl = len(df_log[df_log['Status'] == 'Hit Stoploss'])
+    counts = df_log['Status'].value_counts()
+    active_calls = int(counts.get('Active', 0))
+    hit_targets = int(counts.get('Hit Target', 0))
+    hit_sl = int(counts.get('Hit Stoploss', 0))
     
     with col1:
         st.metric("🟢 Active Calls", active_calls)
@@ -296,7 +381,7 @@ def display_call_log_book():
     col1, col2 = st.columns(2)
     with col1:
         if st.button("📥 Download CSV", use_container_width=True):
-            csv_data = df_log.to_csv(index=False)
+            csv_data = cached_payload('_call_log_csv', (df_log,), lambda: df_log.to_csv(index=False))
             st.download_button(
                 label="💾 Download Call Log",
                 data=csv_data,
@@ -308,18 +393,39 @@ def display_call_log_book():
         if st.button("🔄 Refresh Status", use_container_width=True):
             st.info("Call status will auto-update based on current prices")
 
+def excel_cell(value):
+    """Cell value as to_excel would write it: NaN blank, nested values (e.g. call Targets) as text"""
+    if isinstance(value, float) and value != value:
+        return None
+    if isinstance(value, (dict, list, tuple, set)):
+        return str(value)
+    return value
+
+def write_records_sheet(writer, sheet_name, records):
+    """Write a list-of-dicts log to its own sheet, column by column when xlsxwriter is the engine"""
+    if EXCEL_ENGINE != 'xlsxwriter':
+        pd.DataFrame(records).to_excel(writer, sheet_name=sheet_name, index=False)
+        return
+
+    # Columns in first-seen key order, matching what pd.DataFrame(records) would produce
+    columns = list(dict.fromkeys(key for record in records for key in record))
+    worksheet = writer.book.add_worksheet(sheet_name)
+    worksheet.write_row(0, 0, columns, writer.book.add_format({'bold': True, 'border': 1}))
+    for col, key in enumerate(columns):
+        worksheet.write_column(1, col, [excel_cell(record.get(key)) for record in records])
+
 def create_export_data(df_summary, trade_log, spot_price):
     """Enhanced export data creation with multiple sheets"""
     output = io.BytesIO()
     
     try:
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        with pd.ExcelWriter(output, engine=EXCEL_ENGINE) as writer:
             # Option chain summary
             df_summary.to_excel(writer, sheet_name='Option_Chain_Summary', index=False)
             
             # Trade log
             if trade_log:
-                pd.DataFrame(trade_log).to_excel(writer, sheet_name='Trade_Log', index=False)
+                write_records_sheet(writer, 'Trade_Log', trade_log)
             
             # Price data
             if not st.session_state.price_data.empty:
@@ -327,7 +433,7 @@ def create_export_data(df_summary, trade_log, spot_price):
             
             # Call log book
             if st.session_state.call_log_book:
-                pd.DataFrame(st.session_state.call_log_book).to_excel(writer, sheet_name='Call_Log', index=False)
+                write_records_sheet(writer, 'Call_Log', st.session_state.call_log_book)
             
             # Summary statistics
             summary_stats = {
@@ -358,11 +464,21 @@ def handle_export_data(df_summary, spot_price):
     if st.session_state.get('export_data', False):
         try:
             with st.spinner("📊 Preparing comprehensive Excel report..."):
-                excel_data, filename = create_export_data(
+                # Rebuild the workbook only when a log, the price history, the summary or spot changed
+                sources = (
+                    get_log_df('trade_log'),
+                    get_log_df('call_log_book', CALL_LOG_DTYPES),
+                    st.session_state.price_data,
+                    int(pd.util.hash_pandas_object(df_summary, index=False).sum()),
+                    spot_price
+                )
+                excel_data, filename = cached_payload('_export_workbook', sources, lambda: create_export_data(
                     df_summary, 
                     st.session_state.trade_log, 
                     spot_price
-                )
+                ))
+                if not excel_data:
+                    st.session_state.pop('_export_workbook', None)  # Retry failed builds next time
                 
                 if excel_data:
                     st.download_button(
@@ -393,46 +509,30 @@ def handle_export_data(df_summary, spot_price):
 
 def auto_update_call_log(current_price):
     """Auto update call log with enhanced logic"""
-    if not st.session_state.call_log_book:
+    calls = st.session_state.call_log_book
+    if not calls:
         return
     
-    updated_count = 0
+    # Columnar view of the fields the exit checks need
+    df = pd.DataFrame(calls, columns=['Status', 'Type', 'Strike'])
+    active = df['Status'].eq('Active').to_numpy()
+    is_ce = df['Type'].eq('CE').to_numpy()
+    is_pe = df['Type'].eq('PE').to_numpy()
+    strike = pd.to_numeric(df['Strike'], errors='coerce').fillna(0).to_numpy()
     
-    for call in st.session_state.call_log_book:
-        if call.get("Status") != "Active":
-            continue
-            
-        strike = call.get("Strike", 0)
-        call_type = call.get("Type", "")
-        targets = call.get("Targets", {})
-        stop_loss = call.get("Stoploss", 0)
-        
-        # Simple logic for demo (in reality, use option prices)
-        price_diff = abs(current_price - strike)
-        
-        if call_type == "CE":
-            if current_price >= strike + 50:  # Simplified target logic
-                call["Status"] = "Hit Target"
-                call["Exit_Time"] = datetime.now(timezone("Asia/Kolkata")).strftime("%Y-%m-%d %H:%M:%S")
-                call["Exit_Price"] = current_price
-                updated_count += 1
-            elif current_price <= strike - 100:  # Simplified SL logic
-                call["Status"] = "Hit Stoploss"
-                call["Exit_Time"] = datetime.now(timezone("Asia/Kolkata")).strftime("%Y-%m-%d %H:%M:%S")
-                call["Exit_Price"] = current_price
-                updated_count += 1
-                
-        elif call_type == "PE":
-            if current_price <= strike - 50:  # Simplified target logic
-                call["Status"] = "Hit Target"
-                call["Exit_Time"] = datetime.now(timezone("Asia/Kolkata")).strftime("%Y-%m-%d %H:%M:%S")
-                call["Exit_Price"] = current_price
-                updated_count += 1
-            elif current_price >= strike + 100:  # Simplified SL logic
-                call["Status"] = "Hit Stoploss"
-                call["Exit_Time"] = datetime.now(timezone("Asia/Kolkata")).strftime("%Y-%m-%d %H:%M:%S")
-                call["Exit_Price"] = current_price
-                updated_count += 1
-    
-    if updated_count > 0:
-        st.info(f"🔄 Updated {updated_count} call(s) status based on current price")
\ No newline at end of file
+    # Simple logic for demo (in reality, use option prices): target at 50 points, SL at 100 points
+    hit_target = active & ((is_ce & (current_price >= strike + 50)) | (is_pe & (current_price <= strike - 50)))
+    hit_sl = active & ((is_ce & (current_price <= strike - 100)) | (is_pe & (current_price >= strike + 100)))
+    
+    updated_count = int(hit_target.sum() + hit_sl.sum())
+    if updated_count == 0:
+        return
+    
+    # Write back only the calls that flipped
+    exit_time = datetime.now(IST).strftime("%Y-%m-%d %H:%M:%S")
+    for status, mask in (("Hit Target", hit_target), ("Hit Stoploss", hit_sl)):
+        for i in np.flatnonzero(mask):
+            calls[i].update(Status=status, Exit_Time=exit_time, Exit_Price=current_price)
+    st.session_state["_call_log_book_dirty"] = True
+    
+    st.info(f"🔄 Updated {updated_count} call(s) status based on current price")